@@ -1,16 +1,22 @@
 from flask import Flask, request, jsonify
-from openai import OpenAI
+from llm_backend import create_llm_backend
+from instrumentation import metrics, profiler, get_logger, install_flask
 import mysql.connector
 import requests
 import threading
+import bisect
 import json
 import os
+import time
+import uuid
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+log = get_logger('app-server')
+
 # ========== 설정 ==========
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 DB_CONFIG = {
@@ -27,25 +33,83 @@ web_server_url = f"http://{WEB_SERVER_URL}:{WEB_SERVER_PORT}/api/voice-result"
 
 # ========== 시스템 클래스 ==========
 class GPT:
-    def __init__(self, api_key):
-        self.client = OpenAI(api_key=api_key)
+    def __init__(self, api_key, backend=None):
+        # LLM_BACKEND=openai/record/replay (llm_backend.py 참고)
+        self.backend = backend or create_llm_backend(api_key)
 
     def chat(self, system_prompt, user_input, max_tokens=500):
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_input}
         ]
-        response = self.client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            max_tokens=max_tokens,
-            temperature=0
-        )
-        return response.choices[0].message.content.strip()
+        return self.backend.complete(messages, max_tokens=max_tokens, temperature=0)
+
+class TodayAppointmentCache:
+    """
+    오늘 일정 조회 캐시
+    - 이 프로세스의 insert_appointment 가 유일한 writer 이므로 삽입 시 증분 갱신
+    - 날짜가 바뀌면 (자정) 자동으로 다시 조회
+    - version 으로 조회 도중 변경된 결과가 캐시에 덮어써지는 것을 방지
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.day = None
+        self.rows = None
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def sort_key(row):
+        # ORDER BY start_time 과 동일 (NULL 먼저)
+        start = row[3]
+        return (start is not None, start or '')
+
+    def get(self, day):
+        """(rows 또는 None, version)"""
+        with self.lock:
+            if self.day == day and self.rows is not None:
+                self.hits += 1
+                return list(self.rows), self.version
+            self.misses += 1
+            return None, self.version
+
+    def fill(self, day, rows, version):
+        with self.lock:
+            if self.version == version:
+                self.day = day
+                self.rows = sorted(rows, key=self.sort_key)
+
+    def add(self, day, row):
+        with self.lock:
+            self.version += 1
+            if self.day == day and self.rows is not None:
+                bisect.insort(self.rows, row, key=self.sort_key)
+
+    def invalidate(self):
+        with self.lock:
+            self.version += 1
+            self.day = None
+            self.rows = None
+            self.invalidations += 1
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "day": self.day,
+                "cached_rows": len(self.rows) if self.rows is not None else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / total if total else 0.0
+            }
 
 class Database:
     def __init__(self):
         self.config = DB_CONFIG
+        self.cache = TodayAppointmentCache()
         self.init_database()
 
     def get_connection(self):
@@ -68,6 +132,8 @@ class Database:
         conn.commit()
         cursor.close()
         conn.close()
+        # reset_database 도 이 경로를 타므로 캐시를 비움
+        self.cache.invalidate()
 
     def insert_appointment(self, data):
         conn = self.get_connection()
@@ -82,16 +148,30 @@ class Database:
             data.get("목표시간"),
             data.get("준비물")
         ))
+        appointment_id = cursor.lastrowid
         conn.commit()
         cursor.close()
         conn.close()
+        self.cache.add(datetime.now().strftime('%Y-%m-%d'), (
+            appointment_id,
+            data.get("사용기능"),
+            data.get("이름"),
+            data.get("시간"),
+            data.get("목표시간"),
+            data.get("준비물")
+        ))
+        return appointment_id
 
     def get_today_appointments(self):
+        today = datetime.now().strftime('%Y-%m-%d')
+        rows, version = self.cache.get(today)
+        if rows is not None:
+            return rows
+
         conn = self.get_connection()
         cursor = conn.cursor()
-        today = datetime.now().strftime('%Y-%m-%d')
         cursor.execute('''
-            SELECT function_type, name, start_time, end_time, items 
+            SELECT id, function_type, name, start_time, end_time, items
             FROM appointments
             WHERE DATE(created_at) = %s
             ORDER BY start_time
@@ -99,11 +179,12 @@ class Database:
         rows = cursor.fetchall()
         cursor.close()
         conn.close()
+        self.cache.fill(today, rows, version)
         return rows
 
 class Weather:
     def __init__(self):
-        self.base_url = "https://api.open-meteo.com/v1"
+        self.base_url = os.getenv("WEATHER_API_URL", "https://api.open-meteo.com/v1")
 
     def get_weather_description(self, code):
         codes = {
@@ -134,14 +215,37 @@ class Weather:
             return "맑은 날씨, 기온 20°C"
 
 # ========== 유틸 함수 ==========
-def send_to_web_server(payload):
+def start_trace(data):
+    """라즈베리파이가 보낸 추적 정보를 이어받고, 없으면 새로 생성"""
+    trace = data.get("trace")
+    if not isinstance(trace, dict) or not isinstance(trace.get("hops"), list):
+        trace = {"id": data.get("trace_id") or uuid.uuid4().hex, "kind": "voice", "hops": []}
+        if data.get("timestamp"):
+            trace["hops"].append({"stage": "pi_send", "ts": data["timestamp"]})
+    add_hop(trace, "app_received")
+    return trace
+
+def add_hop(trace, stage):
+    if trace is not None:
+        trace["hops"].append({"stage": stage, "ts": time.time()})
+
+def send_to_web_server(payload, source=None, trace=None):
+    # 웹서버는 source(장치) 별로 상태를 분리해서 보관
+    if source:
+        payload["source"] = source
+    if trace is not None:
+        add_hop(trace, "web_send")
+        payload["trace"] = trace
     try:
-        requests.post(web_server_url, json=payload, timeout=3)
+        with metrics.timer('process_input_stage', stage='web_push'):
+            requests.post(web_server_url, json=payload, timeout=3)
     except Exception as e:
-        print(f"⚠️ 웹 서버 전송 실패: {e}")
+        metrics.inc('web_push_errors')
+        log.warning("⚠️ 웹 서버 전송 실패: %s", e)
 
 # ========== Flask 앱서버 ==========
 app = Flask(__name__)
+install_flask(app, 'app-server')   # /metrics, /debug/profile
 db = Database()
 gpt = GPT(api_key=OPENAI_API_KEY)
 weather = Weather()
@@ -151,7 +255,7 @@ accepting_requests = True
 def handle_voice():
     global accepting_requests
     if not accepting_requests:
-        print("⏸️ 서버가 일시중지 상태입니다. 재개합니다.")
+        log.info("⏸️ 서버가 일시중지 상태입니다. 재개합니다.")
         accepting_requests = True  # 새 요청이 들어오면 자동 재개
 
     data = request.get_json()
@@ -159,11 +263,25 @@ def handle_voice():
         return jsonify({"status": "error", "message": "recognized_text 필요"}), 400
 
     user_input = data['recognized_text']
-    print(f"\n🎤 수신된 음성: {user_input}")
-    threading.Thread(target=process_input, args=(user_input,), daemon=True).start()
+    source = data.get('source')
+    trace = start_trace(data)
+    log.info("🎤 수신된 음성: %s", user_input)
+    threading.Thread(target=process_input, args=(user_input, source, trace), daemon=True).start()
     return jsonify({"status": "ok", "message": "처리 중"}), 200
 
-def process_input(user_input):
+@app.route('/api/cache-stats', methods=['GET'])
+def cache_stats():
+    return jsonify(db.cache.stats()), 200
+
+# 의도 분석 프롬프트가 돌려주는 intent 값
+KNOWN_INTENTS = ("add_appointment", "view_summary", "cleanup_appointments", "reset_database", "exit")
+
+def process_input(user_input, source=None, trace=None):
+    add_hop(trace, "process_start")
+    with profiler.profiled(), metrics.timer('process_input'):
+        _process_input(user_input, source, trace)
+
+def _process_input(user_input, source, trace):
     global accepting_requests
     try:
         intent_prompt = """사용자의 입력을 분석하여 다음 중 하나로 분류:
@@ -173,12 +291,19 @@ def process_input(user_input):
                             4. reset_database
                             5. exit
                             JSON으로 반환: {"intent": "...", "confidence": 0.9, "extracted_data": "..."}"""
-        intent_result = gpt.chat(intent_prompt, user_input)
+        with metrics.timer('process_input_stage', stage='gpt_intent'):
+            intent_result = gpt.chat(intent_prompt, user_input)
+        add_hop(trace, "gpt_intent")
         intent_data = json.loads(intent_result)
         intent = intent_data.get("intent")
-        print(f"🧠 의도: {intent} ({intent_data.get('confidence')})")
+        # 레이블 값은 LLM 출력이므로 알려진 의도만 그대로 기록 (카디널리티 제한)
+        metrics.inc('intents', intent=intent if intent in KNOWN_INTENTS else 'other')
+        log.info("🧠 의도: %s (%s)", intent, intent_data.get('confidence'))
 
         if intent == "add_appointment":
+            with metrics.timer('process_input_stage', stage='weather'):
+                weather_info = weather.get_weather_info()
+            add_hop(trace, "weather")
             classification_prompt = f"""입력을 다음과 같이 분류:
             {{
                 "사용기능": "기능명",
@@ -187,58 +312,67 @@ def process_input(user_input):
                 "목표시간": "HH:MM",
                 "준비물": "필요 준비물"
             }}
-            현재 날씨: {weather.get_weather_info()}"""
-            classified = gpt.chat(classification_prompt, user_input)
+            현재 날씨: {weather_info}"""
+            with metrics.timer('process_input_stage', stage='gpt_classify'):
+                classified = gpt.chat(classification_prompt, user_input)
+            add_hop(trace, "gpt_classify")
             data = json.loads(classified)
-            db.insert_appointment(data)
-            print("✅ 일정이 저장되었습니다.")
-            print(json.dumps(data, indent=2, ensure_ascii=False))
-            send_to_web_server({"type": "add", "data": data})
+            # 웹서버가 일정을 식별할 수 있도록 DB id 를 함께 전달
+            with metrics.timer('process_input_stage', stage='db_insert'):
+                data["id"] = db.insert_appointment(data)
+            add_hop(trace, "db")
+            log.info("✅ 일정이 저장되었습니다.")
+            log.debug("%s", json.dumps(data, indent=2, ensure_ascii=False))
+            send_to_web_server({"type": "add", "data": data}, source, trace)
 
         elif intent == "view_summary":
-            rows = db.get_today_appointments()
+            with metrics.timer('process_input_stage', stage='db_today'):
+                rows = db.get_today_appointments()
+            add_hop(trace, "db")
             if not rows:
-                print("📋 오늘은 일정이 없습니다.")
-                send_to_web_server({"type": "view", "data": []})
+                log.info("📋 오늘은 일정이 없습니다.")
+                send_to_web_server({"type": "view", "data": []}, source, trace)
                 return
-            print("📋 오늘의 일정:")
+            log.info("📋 오늘의 일정: %d건", len(rows))
             result = []
             for i, row in enumerate(rows, 1):
-                function_type, name, start, end, items = row
-                print(f"{i}. {name} ({start}{' ~ ' + end if end else ''}) - 준비물: {items or '없음'}")
+                appointment_id, function_type, name, start, end, items = row
+                log.debug("%d. %s (%s%s) - 준비물: %s", i, name, start, ' ~ ' + end if end else '', items or '없음')
                 result.append({
+                    "id": appointment_id,
                     "사용기능": function_type,
                     "이름": name,
                     "시간": start,
                     "목표시간": end,
                     "준비물": items
                 })
-            send_to_web_server({"type": "view", "data": result})
+            send_to_web_server({"type": "view", "data": result}, source, trace)
 
         elif intent == "cleanup_appointments":
-            print("🧹 정리 기능은 추후 구현 가능")
+            log.info("🧹 정리 기능은 추후 구현 가능")
 
         elif intent == "reset_database":
             db.init_database()
-            print("🗑️ 데이터베이스가 초기화되었습니다.")
+            log.info("🗑️ 데이터베이스가 초기화되었습니다.")
 
         elif intent == "exit":
-            print("📡 라즈베리파이에 음성 인식 종료 신호 전송 중...")
+            log.info("📡 라즈베리파이에 음성 인식 종료 신호 전송 중...")
             try:
                 rpi_ip = os.getenv("RASPBERRY_PI_IP", "192.168.0.50")
                 rpi_port = os.getenv("RASPBERRY_PI_PORT", "5000")
                 requests.post(f"http://{rpi_ip}:{rpi_port}/voice-stop", timeout=3)
-                print("✅ 라즈베리파이에 음성 인식 종료 요청 전송 완료")
-                send_to_web_server({"type": "exit", "message": "음성 인식이 종료되었습니다."})
+                log.info("✅ 라즈베리파이에 음성 인식 종료 요청 전송 완료")
+                send_to_web_server({"type": "exit", "message": "음성 인식이 종료되었습니다."}, source, trace)
                 accepting_requests = False
             except Exception as e:
-                print(f"❌ 종료 신호 전송 실패: {e}")
+                log.error("❌ 종료 신호 전송 실패: %s", e)
 
         else:
-            print("❓ 의도 분석 실패")
+            log.warning("❓ 의도 분석 실패")
 
     except Exception as e:
-        print(f"❌ 처리 오류: {e}")
+        metrics.inc('process_input_errors')
+        log.error("❌ 처리 오류: %s", e)
 
 if __name__ == '__main__':
     import signal
@@ -0,0 +1,285 @@
+"""
+전체 서비스 부하 생성 + 지연 시간 측정
+
+    python bench/loadgen.py --pis 10 --dashboards 5 --voice-rate 0.5 --duration 30
+    python bench/loadgen.py --compare bench/results/이전결과.json
+
+- N 대의 라즈베리파이: /api/distance 를 10Hz 로 전송
+- M 개의 대시보드: /api/state 를 500ms 마다 조회 (index.html 과 동일)
+- 음성 명령: 앱서버 /api/voice 로 초당 R 건 전송
+- 기본은 웹서버/앱서버를 이 프로세스 안에서 띄우고 OpenAI, open-meteo, MySQL 은 로컬 대역 사용
+  (--web-url/--app-url 을 주면 이미 떠 있는 서버를 대상으로 측정)
+- 결과는 엔드포인트별 처리량과 p50/p95/p99 지연을 JSON 으로 저장
+  지연은 예정 전송 시각부터 측정 (서버가 밀려 클라이언트가 늦게 보낸 시간도 포함, coordinated omission 방지)
+  실제 전송부터 잰 서버 응답 시간은 service_* 로 따로 기록
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'web-server'))
+
+import stubs
+
+VOICE_COMMANDS = [
+    "내일 오전 10시 팀 회의 추가해줘",
+    "오늘 일정 알려줘",
+    "오후 3시 고객 미팅 추가해줘",
+    "오늘 요약해줘",
+]
+
+
+# ========== 측정 ==========
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, duration):
+    """[(예정 시각 기준 지연, ok, 서비스 시간)] -> 통계 dict (지연 단위 ms)"""
+    latencies = sorted(latency * 1000 for latency, ok, _ in samples if ok)
+    service = sorted(service * 1000 for _, ok, service in samples if ok)
+    errors = sum(1 for _, ok, _ in samples if not ok)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': len(samples) / duration if duration else 0.0,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': latencies[-1] if latencies else None,
+        'service_p50_ms': percentile(service, 50),
+        'service_p99_ms': percentile(service, 99),
+    }
+
+
+class Recorder:
+    """엔드포인트별 (지연, 성공, 서비스 시간) 기록 - 클라이언트 스레드마다 별도 리스트"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def bucket(self, name):
+        samples = []
+        with self.lock:
+            self.samples.setdefault(name, []).append(samples)
+        return samples
+
+    def merged(self):
+        return {name: [s for part in parts for s in part] for name, parts in self.samples.items()}
+
+
+def run_client(name, rate, deadline, recorder, request):
+    """
+    rate(Hz) 로 request(session, i) 를 반복, 밀리면 쉬지 않고 따라잡음
+    - 지연은 예정 시각(next_time)부터 측정: 밀린 동안 기다린 시간도 실제 장치가 겪는 지연
+    """
+    samples = recorder.bucket(name)
+    session = requests.Session()
+    interval = 1.0 / rate
+    next_time = time.perf_counter()
+    i = 0
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        scheduled = next_time
+        if scheduled > now:
+            time.sleep(scheduled - now)
+        started = time.perf_counter()
+        try:
+            response = request(session, i)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        finished = time.perf_counter()
+        samples.append((finished - scheduled, ok, finished - started))
+        next_time += interval
+        i += 1
+
+
+# ========== 로컬 서버 기동 ==========
+def start_wsgi(app):
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def start_local_services(args, recorder):
+    """웹서버 + 앱서버(대역 사용)를 이 프로세스에서 실행, (web_url, app_url) 반환"""
+    import logging
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    from app import create_app
+    web_server, web_url = start_wsgi(create_app())
+
+    stub = stubs.start_stub_server(llm_latency=args.llm_latency, weather_latency=args.weather_latency)
+    stub_url = f"http://127.0.0.1:{stub.server_port}"
+    stubs.install_fake_mysql(os.path.join(tempfile.mkdtemp(prefix='bench-db-'), 'appointments.db'))
+
+    # app_server 는 import 시점에 환경변수를 읽음
+    if args.llm_cassette:
+        # 스텁 대신 기록된 LLM 응답을 재생 (지연은 --llm-latency 가 아니라 기록값 또는 LLM_REPLAY_LATENCY)
+        os.environ.update({'LLM_BACKEND': 'replay', 'LLM_CASSETTE': args.llm_cassette})
+    os.environ.update({
+        'OPENAI_API_KEY': 'bench',
+        'OPENAI_BASE_URL': f"{stub_url}/v1",
+        'WEATHER_API_URL': f"{stub_url}/v1",
+        'WEB_SERVER_URL': '127.0.0.1',
+        'WEB_SERVER_PORT': str(web_server.server_port),
+    })
+    import app_server
+
+    # 음성 처리 파이프라인(GPT -> DB -> 웹 푸시) 전체 시간도 기록
+    process_input = app_server.process_input
+    pipeline_samples = recorder.bucket('voice_pipeline')
+
+    def timed_process_input(*a, **kw):
+        started = time.perf_counter()
+        try:
+            process_input(*a, **kw)
+        finally:
+            elapsed = time.perf_counter() - started
+            pipeline_samples.append((elapsed, True, elapsed))
+
+    app_server.process_input = timed_process_input
+    _, app_url = start_wsgi(app_server.app)
+    return web_url, app_url
+
+
+# ========== 시나리오 ==========
+def run(args):
+    recorder = Recorder()
+    if args.web_url and args.app_url:
+        web_url, app_url = args.web_url.rstrip('/'), args.app_url.rstrip('/')
+    else:
+        web_url, app_url = start_local_services(args, recorder)
+    print(f"🌐 웹서버: {web_url}")
+    print(f"📱 앱서버: {app_url}")
+
+    def post_distance(source):
+        def request(session, i):
+            diff = (i % 50) - 10.0
+            return session.post(f"{web_url}/api/distance", json={
+                "distance_difference": diff,
+                "current_distance": 100.0 + diff,
+                "initial_distance": 100.0,
+                "elapsed_time": (i % 50) * 0.1,
+                "timestamp": time.time(),
+                "source": source,
+                "unit": "pixels"
+            }, timeout=5)
+        return request
+
+    def get_state(session, i):
+        return session.get(f"{web_url}/api/state", timeout=5)
+
+    def post_voice(session, i):
+        return session.post(f"{app_url}/api/voice", json={
+            "recognized_text": VOICE_COMMANDS[i % len(VOICE_COMMANDS)],
+            "timestamp": time.time(),
+            "source": "bench-pi-0",
+            "loop_mode": True
+        }, timeout=5)
+
+    deadline = time.perf_counter() + args.duration
+    threads = []
+    for n in range(args.pis):
+        threads.append(threading.Thread(
+            target=run_client, args=('/api/distance', args.distance_hz, deadline, recorder, post_distance(f"bench-pi-{n}"))))
+    for _ in range(args.dashboards):
+        threads.append(threading.Thread(
+            target=run_client, args=('/api/state', args.poll_hz, deadline, recorder, get_state)))
+    if args.voice_rate > 0:
+        threads.append(threading.Thread(
+            target=run_client, args=('/api/voice', args.voice_rate, deadline, recorder, post_voice)))
+
+    print(f"🚀 부하 시작: 파이 {args.pis}대 x {args.distance_hz}Hz, 대시보드 {args.dashboards}개, "
+          f"음성 {args.voice_rate}/s, {args.duration}s")
+    started = time.perf_counter()
+    for t in threads:
+        t.daemon = True
+        t.start()
+    for t in threads:
+        t.join()
+    duration = time.perf_counter() - started
+    # 백그라운드 음성 처리 마무리 대기 (처리량 계산에는 포함하지 않음)
+    time.sleep(min(2.0, args.llm_latency * 2 + 0.5))
+
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'config': {k: v for k, v in vars(args).items() if k not in ('out', 'compare')},
+        'duration_s': duration,
+        'endpoints': {
+            name: summarize(samples, duration)
+            for name, samples in sorted(recorder.merged().items()) if samples
+        }
+    }
+
+
+def print_report(result, baseline=None):
+    print(f"\n📊 결과 ({result['duration_s']:.1f}s)")
+    print(f"{'endpoint':<16}{'req':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'svc p99':>9}")
+    fmt = lambda v: f"{v:9.1f}" if v is not None else f"{'-':>9}"
+    for name, s in result['endpoints'].items():
+        print(f"{name:<16}{s['requests']:>8}{s['errors']:>6}{s['throughput_rps']:>9.1f}"
+              f"{fmt(s['p50_ms'])}{fmt(s['p95_ms'])}{fmt(s['p99_ms'])}{fmt(s['max_ms'])}{fmt(s.get('service_p99_ms'))}")
+        if baseline and name in baseline['endpoints']:
+            b = baseline['endpoints'][name]
+            deltas = []
+            for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+                if s[key] is not None and b.get(key):
+                    deltas.append(f"{key[:3]} {(s[key] - b[key]) / b[key] * 100:+.0f}%")
+            if deltas:
+                print(f"{'':<16}  vs 기준: {', '.join(deltas)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="웹서버/앱서버 부하 테스트")
+    parser.add_argument('--pis', type=int, default=5, help="시뮬레이션할 라즈베리파이 수")
+    parser.add_argument('--distance-hz', type=float, default=10.0)
+    parser.add_argument('--dashboards', type=int, default=3, help="/api/state 폴링 대시보드 수")
+    parser.add_argument('--poll-hz', type=float, default=2.0)
+    parser.add_argument('--voice-rate', type=float, default=0.5, help="초당 음성 명령 수")
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--llm-latency', type=float, default=0.3, help="LLM 스텁 합성 지연 (초)")
+    parser.add_argument('--weather-latency', type=float, default=0.05)
+    parser.add_argument('--llm-cassette', help="LLM 스텁 대신 재생할 카세트 (llm_backend.py record 모드로 기록)")
+    parser.add_argument('--web-url', help="외부 웹서버 (예: http://192.168.1.101:3000)")
+    parser.add_argument('--app-url', help="외부 앱서버 (예: http://192.168.1.100:8080)")
+    parser.add_argument('--out', help="결과 JSON 경로 (기본: bench/results/<시각>.json)")
+    parser.add_argument('--compare', help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    result = run(args)
+
+    out = args.out or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'results', f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    print(f"\n💾 저장: {out}")
+
+
+if __name__ == '__main__':
+    main()
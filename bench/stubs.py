@@ -0,0 +1,147 @@
+"""
+부하 테스트용 로컬 대역(stand-in)
+- OpenAI 호환 /v1/chat/completions 스텁 (합성 지연 설정 가능)
+- open-meteo /v1/forecast 스텁
+- sqlite3 로 동작하는 mysql.connector 대체 모듈
+"""
+import json
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# ========== HTTP 스텁 서버 ==========
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, body, status=200):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        if self.path.startswith('/v1/forecast'):
+            time.sleep(self.server.weather_latency)
+            self._send_json({'current': {
+                'temperature_2m': 21.5,
+                'relative_humidity_2m': 40,
+                'weather_code': 1,
+                'wind_speed_10m': 3.2
+            }})
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+    def do_POST(self):
+        if self.path.rstrip('/').endswith('/chat/completions'):
+            body = self._read_json()
+            time.sleep(self.server.llm_latency)
+            content = fake_completion(body.get('messages', []))
+            self._send_json({
+                'id': 'chatcmpl-stub',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': body.get('model', 'stub'),
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': content},
+                    'finish_reason': 'stop'
+                }],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+            })
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+
+def fake_completion(messages):
+    """app_server 프롬프트에 맞는 결정적 응답"""
+    system = next((m['content'] for m in messages if m['role'] == 'system'), '')
+    user = next((m['content'] for m in messages if m['role'] == 'user'), '')
+
+    if 'add_appointment' in system:
+        intent = 'add_appointment' if '추가' in user else 'view_summary'
+        return json.dumps({'intent': intent, 'confidence': 0.9, 'extracted_data': user}, ensure_ascii=False)
+
+    hour = random.Random(user).randint(8, 20)
+    return json.dumps({
+        '사용기능': '회의',
+        '이름': user[:20],
+        '시간': f'{hour:02d}:00',
+        '목표시간': f'{hour + 1:02d}:00',
+        '준비물': '노트북'
+    }, ensure_ascii=False)
+
+
+def start_stub_server(llm_latency=0.0, weather_latency=0.0, host='127.0.0.1', port=0):
+    """OpenAI + open-meteo 스텁 서버를 백그라운드 스레드로 실행, 서버 반환"""
+    server = ThreadingHTTPServer((host, port), _StubHandler)
+    server.daemon_threads = True
+    server.llm_latency = llm_latency
+    server.weather_latency = weather_latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ========== mysql.connector 대체 ==========
+class _Cursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def execute(self, sql, params=()):
+        return self._cursor.execute(_translate(sql), params)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class _Connection:
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+
+    def cursor(self):
+        return _Cursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+def _translate(sql):
+    """app_server 가 쓰는 MySQL 문법을 sqlite 문법으로 변환"""
+    sql = sql.replace('%s', '?')
+    sql = sql.replace('INT AUTO_INCREMENT PRIMARY KEY', 'INTEGER PRIMARY KEY AUTOINCREMENT')
+    sql = sql.replace('TIMESTAMP DEFAULT CURRENT_TIMESTAMP', "TIMESTAMP DEFAULT (datetime('now', 'localtime'))")
+    return re.sub(r'\)\s*ENGINE=.*$', ')', sql.strip(), flags=re.S)
+
+
+def install_fake_mysql(path):
+    """sys.modules 에 mysql.connector 대체 모듈 등록 (app_server import 전에 호출)"""
+    connector = types.ModuleType('mysql.connector')
+    connector.connect = lambda **config: _Connection(path)
+    mysql = types.ModuleType('mysql')
+    mysql.connector = connector
+    sys.modules['mysql'] = mysql
+    sys.modules['mysql.connector'] = connector
@@ -0,0 +1,51 @@
+"""
+웹서버 사본 일치 확인
+- web-server/ 는 단독 배포되므로 공용 모듈을 app/services/ 에 복사해서 사용
+- 원본(저장소 루트)과 사본이 다르면 종료 코드 1 (배포 전/CI 에서 실행)
+
+    python check_vendored.py         # 확인
+    python check_vendored.py --fix   # 원본 -> 사본 복사
+"""
+import argparse
+import difflib
+import os
+import shutil
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# (원본, 사본)
+VENDORED = [
+    ('instrumentation.py', 'web-server/app/services/instrumentation.py'),
+    ('distance_udp.py', 'web-server/app/services/distance_udp.py'),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="공용 모듈 사본 일치 확인")
+    parser.add_argument('--fix', action='store_true', help="원본을 사본에 복사")
+    args = parser.parse_args()
+
+    stale = 0
+    for source, copy in VENDORED:
+        source_path, copy_path = os.path.join(ROOT, source), os.path.join(ROOT, copy)
+        with open(source_path, encoding='utf-8') as f:
+            expected = f.read()
+        with open(copy_path, encoding='utf-8') as f:
+            actual = f.read()
+        if expected == actual:
+            print(f"✅ {copy}")
+            continue
+        if args.fix:
+            shutil.copyfile(source_path, copy_path)
+            print(f"🔄 {copy} <- {source}")
+            continue
+        stale += 1
+        print(f"❌ {copy} 가 {source} 와 다릅니다:")
+        sys.stdout.writelines(difflib.unified_diff(
+            actual.splitlines(True), expected.splitlines(True), fromfile=copy, tofile=source))
+    return 1 if stale else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
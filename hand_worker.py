@@ -0,0 +1,190 @@
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from instrumentation import metrics
+
+# MediaPipe 입력 크기 (extract_landmarks 의 320x240 리사이즈와 동일)
+FRAME_SHAPE = (240, 320, 3)
+
+
+class FrameRing:
+    """
+    shared_memory 기반 프레임 링 버퍼
+    - 슬롯 수만큼 고정 크기 uint8 프레임을 한 블록에 배치
+    - 프레임 자체는 피클링 없이 공유 메모리로만 전달
+    """
+
+    def __init__(self, slots, shape=FRAME_SHAPE, name=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        size = slots * int(np.prod(self.shape))
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def view(self, slot):
+        return self.frames[slot]
+
+    def close(self):
+        # ndarray 가 버퍼를 잡고 있으면 close() 가 실패하므로 먼저 해제
+        self.frames = None
+        self.shm.close()
+
+    def unlink(self):
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _extract(hands, frame, width, height):
+    """공유 메모리 슬롯에서 랜드마크 추출 (원본 프레임 좌표계로 환산)"""
+    import cv2
+
+    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    results = hands.process(rgb_frame)
+    if results.multi_hand_landmarks:
+        hand_landmarks = results.multi_hand_landmarks[0]
+        return np.array([[lm.x * width, lm.y * height] for lm in hand_landmarks.landmark])
+    return None
+
+
+def _worker_main(shm_name, slots, shape, task_queue, result_queue, hands_options):
+    """추론 워커 프로세스 본체"""
+    import mediapipe as mp
+
+    ring = FrameRing(slots, shape, name=shm_name)
+    hands = mp.solutions.hands.Hands(**hands_options)
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+            slot, frame_id, width, height = task
+            started = time.perf_counter()
+            try:
+                landmarks = _extract(hands, ring.view(slot), width, height)
+            except Exception:
+                landmarks = None
+            # 결과 반환과 함께 슬롯 반납, 추론 시간은 메인 프로세스 메트릭으로 집계
+            result_queue.put((slot, frame_id, landmarks, time.perf_counter() - started))
+    finally:
+        hands.close()
+        ring.close()
+
+
+class HandInferenceWorker:
+    """
+    MediaPipe 손 추론을 별도 프로세스로 분리
+    - submit(): 카메라 프레임을 슬롯에 리사이즈해서 바로 기록
+    - poll(): 완료된 (frame_id, landmarks) 목록 회수 (논블로킹)
+    - 워커에는 한 번에 한 프레임만 전달, 추론 중에 들어온 프레임은 대기 슬롯 하나에 보관
+      대기 중인 프레임은 새 프레임으로 덮어씀 (최신 프레임 우선, 밀린 프레임이 쌓이지 않음)
+    - 슬롯 2개: 추론 중 1 + 대기 1 (대기 슬롯은 워커에 넘기기 전이라 덮어써도 안전)
+    """
+
+    def __init__(self, hands_options, slots=2, shape=FRAME_SHAPE):
+        if slots < 2:
+            raise ValueError(f"slots 는 2 이상이어야 합니다 (추론 중 1 + 대기 1): {slots}")
+        self.hands_options = dict(hands_options)
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.ring = None
+        self.process = None
+        self.task_queue = None
+        self.result_queue = None
+        self.free_slots = []
+        # 워커에 전달된 작업 유무, 워커에 넘기기 전 최신 작업 (slot, frame_id, width, height)
+        self.in_flight = False
+        self.pending = None
+        self.next_frame_id = 0
+        self.dropped_frames = 0
+
+    def start(self):
+        # mediapipe(TFLite) 스레드와 fork 충돌을 피하기 위해 spawn 사용
+        ctx = multiprocessing.get_context('spawn')
+        self.ring = FrameRing(self.slots, self.shape)
+        self.task_queue = ctx.Queue()
+        self.result_queue = ctx.Queue()
+        self.free_slots = list(range(self.slots))
+        self.in_flight = False
+        self.pending = None
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(self.ring.name, self.slots, self.shape,
+                  self.task_queue, self.result_queue, self.hands_options),
+            daemon=True
+        )
+        self.process.start()
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def submit(self, frame):
+        """프레임을 워커에 전달, 추론 중이면 대기 프레임으로 보관 (이전 대기 프레임은 버림)"""
+        import cv2
+
+        if self.pending is not None:
+            slot = self.pending[0]
+            self.dropped_frames += 1
+        else:
+            slot = self.free_slots.pop()
+        height, width = self.shape[0], self.shape[1]
+        cv2.resize(frame, (width, height), dst=self.ring.view(slot))
+
+        frame_id = self.next_frame_id
+        self.next_frame_id += 1
+        task = (slot, frame_id, frame.shape[1], frame.shape[0])
+        if self.in_flight:
+            self.pending = task
+        else:
+            self._dispatch(task)
+        return True
+
+    def _dispatch(self, task):
+        self.task_queue.put(task)
+        self.in_flight = True
+
+    def poll(self):
+        """완료된 추론 결과 (frame_id 순) 반환, 대기 프레임이 있으면 이어서 전달"""
+        results = []
+        while True:
+            try:
+                slot, frame_id, landmarks, elapsed = self.result_queue.get_nowait()
+            except queue.Empty:
+                break
+            metrics.observe('extract_landmarks', elapsed, mode='process')
+            self.free_slots.append(slot)
+            self.in_flight = False
+            results.append((frame_id, landmarks))
+
+        if not self.in_flight and self.pending is not None:
+            task, self.pending = self.pending, None
+            self._dispatch(task)
+        return results
+
+    def stop(self):
+        if self.process is not None:
+            try:
+                self.task_queue.put(None)
+                self.process.join(timeout=2)
+            except Exception:
+                pass
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process = None
+
+        if self.ring is not None:
+            self.ring.close()
+            self.ring.unlink()
+            self.ring = None
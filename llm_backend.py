@@ -0,0 +1,237 @@
+"""
+LLM 백엔드 (GPT 클래스에서 사용)
+- openai: 실제 OpenAI API 호출
+- record: 실제 호출 + 프롬프트 -> 응답, 지연 시간을 카세트(JSONL)에 기록
+- replay: 카세트에서 응답을 찾아 합성 지연 후 반환 (네트워크 없음)
+
+카세트를 OpenAI 호환 로컬 서버로 제공:
+    python llm_backend.py serve --cassette llm_cassette.jsonl --latency recorded --port 8900
+    (앱서버에서 OPENAI_BASE_URL=http://localhost:8900/v1)
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+
+def request_key(messages, model, max_tokens, temperature):
+    """요청 전체 기준 키"""
+    raw = json.dumps([messages, model, max_tokens, temperature], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def loose_key(messages):
+    """
+    느슨한 키: 시스템 프롬프트 첫 줄 + 사용자 입력
+    (분류 프롬프트에 들어가는 현재 날씨처럼 매번 바뀌는 부분은 무시)
+    """
+    system = next((m['content'] for m in messages if m['role'] == 'system'), '')
+    user = next((m['content'] for m in messages if m['role'] == 'user'), '')
+    raw = json.dumps([system.strip().splitlines()[0] if system.strip() else '', user], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ReplayMiss(KeyError):
+    """카세트에 없는 요청"""
+
+
+class OpenAIBackend:
+    def __init__(self, api_key, model=DEFAULT_MODEL):
+        from openai import OpenAI
+        self.client = OpenAI(api_key=api_key)
+        self.model = model
+
+    def complete(self, messages, max_tokens=500, temperature=0):
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        return response.choices[0].message.content.strip()
+
+
+class RecordingBackend:
+    """실제 백엔드 호출 결과를 카세트에 추가 기록"""
+
+    def __init__(self, inner, path):
+        self.inner = inner
+        self.model = inner.model
+        self.path = path
+        self.lock = threading.Lock()
+
+    def complete(self, messages, max_tokens=500, temperature=0):
+        started = time.perf_counter()
+        completion = self.inner.complete(messages, max_tokens=max_tokens, temperature=temperature)
+        latency = time.perf_counter() - started
+
+        entry = {
+            "key": request_key(messages, self.model, max_tokens, temperature),
+            "loose_key": loose_key(messages),
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": messages,
+            "completion": completion,
+            "latency_s": latency,
+            "recorded_at": time.time()
+        }
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        return completion
+
+
+class ReplayBackend:
+    """
+    카세트 재생
+    - latency='recorded': 기록된 지연 그대로, 숫자: 고정 지연(초), 0: 지연 없음
+    - jitter: 지연에 곱할 ±비율 (예: 0.1 -> ±10%)
+    """
+
+    def __init__(self, path, latency='recorded', jitter=0.0, model=DEFAULT_MODEL):
+        self.path = path
+        self.latency = latency
+        self.jitter = jitter
+        self.model = model
+        self.entries = {}
+        self.loose_entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"LLM 카세트가 없습니다: {self.path}")
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                # 같은 요청이 여러 번 기록된 경우 마지막 것을 사용
+                self.entries[entry["key"]] = entry
+                self.loose_entries[entry["loose_key"]] = entry
+
+    def lookup(self, messages, max_tokens=500, temperature=0):
+        entry = self.entries.get(request_key(messages, self.model, max_tokens, temperature))
+        if entry is None:
+            entry = self.loose_entries.get(loose_key(messages))
+        if entry is None:
+            self.misses += 1
+            raise ReplayMiss("카세트에 없는 요청입니다.")
+        self.hits += 1
+        return entry
+
+    def delay_for(self, entry):
+        delay = entry["latency_s"] if self.latency == 'recorded' else float(self.latency)
+        if self.jitter:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(delay, 0.0)
+
+    def complete(self, messages, max_tokens=500, temperature=0):
+        entry = self.lookup(messages, max_tokens, temperature)
+        delay = self.delay_for(entry)
+        if delay:
+            time.sleep(delay)
+        return entry["completion"]
+
+
+def create_llm_backend(api_key):
+    """LLM_BACKEND 환경변수(openai/record/replay)에 따라 백엔드 생성"""
+    mode = os.getenv("LLM_BACKEND", "openai").lower()
+    model = os.getenv("LLM_MODEL", DEFAULT_MODEL)
+    cassette = os.getenv("LLM_CASSETTE", "llm_cassette.jsonl")
+
+    if mode == "openai":
+        return OpenAIBackend(api_key, model)
+    if mode == "record":
+        return RecordingBackend(OpenAIBackend(api_key, model), cassette)
+    if mode == "replay":
+        return ReplayBackend(
+            cassette,
+            latency=os.getenv("LLM_REPLAY_LATENCY", "recorded"),
+            jitter=float(os.getenv("LLM_REPLAY_JITTER", 0)),
+            model=model
+        )
+    raise ValueError(f"알 수 없는 LLM_BACKEND: {mode}")
+
+
+# ========== OpenAI 호환 재생 서버 ==========
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, body, status=200):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json({"error": {"message": "not found"}}, 404)
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        backend = self.server.backend
+        try:
+            content = backend.complete(
+                body.get("messages", []),
+                max_tokens=body.get("max_tokens", 500),
+                temperature=body.get("temperature", 0)
+            )
+        except ReplayMiss as e:
+            self._send_json({"error": {"message": str(e), "type": "replay_miss"}}, 404)
+            return
+
+        self._send_json({
+            "id": "chatcmpl-replay",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", backend.model),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        })
+
+
+def serve(backend, host='127.0.0.1', port=8900):
+    """재생 백엔드를 OpenAI 호환 HTTP 서버로 제공 (블로킹)"""
+    server = ThreadingHTTPServer((host, port), _ReplayHandler)
+    server.daemon_threads = True
+    server.backend = backend
+    print(f"🎞️ LLM 재생 서버: http://{host}:{server.server_port}/v1 ({len(backend.entries)}건)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"📊 재생 결과: hit {backend.hits}, miss {backend.misses}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="LLM 카세트 재생 서버")
+    sub = parser.add_subparsers(dest='command', required=True)
+    serve_parser = sub.add_parser('serve')
+    serve_parser.add_argument('--cassette', default='llm_cassette.jsonl')
+    serve_parser.add_argument('--latency', default='recorded', help="'recorded' 또는 초 단위 고정 지연")
+    serve_parser.add_argument('--jitter', type=float, default=0.0)
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8900)
+    args = parser.parse_args()
+
+    serve(ReplayBackend(args.cassette, latency=args.latency, jitter=args.jitter), args.host, args.port)
@@ -7,9 +7,13 @@ import requests
 import mediapipe as mp
 import numpy as np
 import threading
+import uuid
 import speech_recognition as sr
 from collections import deque
 from flask import Flask, request, jsonify
+from hand_worker import HandInferenceWorker
+from distance_udp import DistanceSender
+from instrumentation import metrics, profiler, get_logger, install_flask
 
 # python-dotenv 설치 확인 및 로드
 try:
@@ -41,6 +45,9 @@ class VoiceStopGestureRecognizer:
         self.app_server_port = os.getenv('APP_SERVER_PORT', '8080')
         self.web_server_port = os.getenv('WEB_SERVER_PORT', '3000')
 
+        # 장치 식별자 (웹서버는 source 별로 상태를 분리)
+        self.device_id = os.getenv('DEVICE_ID', 'raspberry_pi')
+
         # 라즈베리 파이 HTTP 서버 설정
         self.rpi_port = int(os.getenv('RASPBERRY_PI_PORT', '5000'))
 
@@ -48,17 +55,38 @@ class VoiceStopGestureRecognizer:
         self.app_server_url = f"http://{self.app_server_ip}:{self.app_server_port}/api"
         self.web_server_url = f"http://{self.web_server_ip}:{self.web_server_port}/api"
 
+        # 거리 전송 방식 (http: /api/distance JSON, udp: 고정 크기 데이터그램)
+        self.distance_transport = os.getenv('DISTANCE_TRANSPORT', 'http').lower()
+        self.distance_sender = None
+        if self.distance_transport == 'udp':
+            try:
+                self.distance_sender = DistanceSender(
+                    self.web_server_ip, os.getenv('DISTANCE_UDP_PORT', '3001'), self.device_id)
+            except ValueError as e:
+                # 잘린 source 로 보내면 음성 결과와 다른 장치로 저장되므로 HTTP 로 전송
+                print(f"⚠️ UDP 거리 전송 불가, HTTP 로 전송합니다: {e}")
+                self.distance_transport = 'http'
+
         self.POSE_DIR = "stored_poses"
 
         # MediaPipe 초기화[2][3]
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
+        # - process: 별도 추론 프로세스 (공유 메모리 프레임 전달)
+        # - inline: 메인 루프에서 직접 추론
+        self.inference_mode = os.getenv('HAND_INFERENCE_MODE', 'process')
+        self.hands_options = dict(
             static_image_mode=False,
             max_num_hands=1,
             min_detection_confidence=0.6,
             min_tracking_confidence=0.4,
             model_complexity=0
         )
+        self.mp_hands = mp.solutions.hands
+        self.hands = None
+        self.hand_worker = None
+        if self.inference_mode == 'process':
+            self.hand_worker = HandInferenceWorker(self.hands_options)
+        else:
+            self.hands = self.mp_hands.Hands(**self.hands_options)
 
         # 음성 인식 초기화[4]
         self.recognizer = sr.Recognizer()
@@ -93,6 +121,7 @@ class VoiceStopGestureRecognizer:
         # Flask 앱 초기화
         self.flask_app = Flask(__name__)
         self.setup_flask_routes()
+        self.log = get_logger('raspberry-pi')
 
         self.saved_poses = self.load_poses()
         self.print_initialization_status()
@@ -102,8 +131,12 @@ class VoiceStopGestureRecognizer:
         print("=" * 60)
         print("🤖 HTTP 음성 중지 신호 제스처 인식기 초기화 완료")
         print(f"📱 앱서버 (음성): {self.app_server_url}")
-        print(f"🌐 웹서버 (거리): {self.web_server_url}")
+        if self.distance_sender is not None:
+            print(f"🌐 웹서버 (거리): udp://{self.distance_sender.address[0]}:{self.distance_sender.address[1]}")
+        else:
+            print(f"🌐 웹서버 (거리): {self.web_server_url}")
         print(f"🔌 라즈베리파이 HTTP 서버: 포트 {self.rpi_port}")
+        print(f"🧠 손 추론 모드: {self.inference_mode}")
         print(f"📁 저장된 포즈: {list(self.saved_poses.keys())}")
         print(f"🎤 마이크 상태: {'✅ 준비됨' if self.microphone else '❌ 오류'}")
         print("🔄 left_hand: 음성 루프 시작 (HTTP /voice-stop 신호로 종료)")
@@ -113,6 +146,8 @@ class VoiceStopGestureRecognizer:
 
     def setup_flask_routes(self):
         """Flask HTTP 엔드포인트 설정"""
+        install_flask(self.flask_app, 'raspberry-pi')   # /metrics, /debug/profile
+
         @self.flask_app.route('/voice-stop', methods=['POST'])
         def voice_stop():
             """음성 인식 중지 신호 수신"""
@@ -170,6 +205,45 @@ class VoiceStopGestureRecognizer:
         except Exception:
             self.microphone = sr.Microphone()
 
+    def start_hand_worker(self):
+        """손 추론 워커 프로세스 시작 (실패 시 인라인 추론으로 전환)"""
+        if self.hand_worker is None:
+            return
+        try:
+            self.hand_worker.start()
+            print("🧠 손 추론 워커 프로세스 시작됨")
+        except Exception as e:
+            print(f"⚠️ 추론 워커 시작 실패, 인라인 모드로 전환: {e}")
+            self.fallback_to_inline()
+
+    def fallback_to_inline(self):
+        """워커 프로세스 정리 후 메인 프로세스 추론으로 전환"""
+        if self.hand_worker is not None:
+            self.hand_worker.stop()
+            self.hand_worker = None
+        if self.hands is None:
+            self.hands = self.mp_hands.Hands(**self.hands_options)
+        self.inference_mode = 'inline'
+
+    def handle_landmarks(self, landmarks, current_gesture):
+        """랜드마크 기반 제스처 판정 + 거리 측정, 갱신된 current_gesture 반환"""
+        detected_gesture = self.recognize_gesture(landmarks)
+
+        if detected_gesture and detected_gesture != current_gesture:
+            current_gesture = detected_gesture
+            metrics.inc('gestures', gesture=detected_gesture)
+            self.log.info("🎯 제스처 감지: %s", detected_gesture)
+            time.sleep(0.2)
+            self.execute_gesture(detected_gesture)
+
+        # 거리 측정 처리
+        self.process_timed_distance_measurement(landmarks)
+
+        if detected_gesture is None:
+            current_gesture = None
+        return current_gesture
+
+    @metrics.timed('extract_landmarks', mode='inline')
     def extract_landmarks(self, frame):
         """손 랜드마크 추출[2]"""
         try:
@@ -209,6 +283,7 @@ class VoiceStopGestureRecognizer:
         except Exception:
             return float('inf')
 
+    @metrics.timed('recognize_gesture')
     def recognize_gesture(self, landmarks):
         if landmarks is None:
             self.gesture_buffer.append(None)
@@ -287,13 +362,17 @@ class VoiceStopGestureRecognizer:
                     print("🎤 음성 입력 대기 중... (입력 시작까지 무한 대기, 최대 30초 말 가능)")
                     audio = self.recognizer.listen(source, timeout=None, phrase_time_limit=30)
 
+                # 발화 종료 시점부터 대시보드 반영까지 추적
+                trace = self.new_trace('voice')
+                self.add_trace_hop(trace, 'speech_end')
                 print("🔄 음성 처리 중...")
                 text = self.recognizer.recognize_google(audio, language='ko-KR')
+                self.add_trace_hop(trace, 'stt_done')
                 print(f"✅ 인식된 텍스트: '{text}'")
                 time.sleep(0.2)
 
                 # 앱서버로 음성인식 결과 전송
-                self.send_voice_to_app_server(text)
+                self.send_voice_to_app_server(text, trace)
 
             except sr.WaitTimeoutError:
                 print("⏰ 음성 입력 타임아웃 - 다시 시도")
@@ -317,26 +396,40 @@ class VoiceStopGestureRecognizer:
         time.sleep(0.3)
 
 
-    def send_voice_to_app_server(self, text):
+    def new_trace(self, kind):
+        """서비스 간 추적용 상관관계 ID + 구간별 시각 기록"""
+        return {"id": uuid.uuid4().hex, "kind": kind, "hops": []}
+
+    def add_trace_hop(self, trace, stage):
+        trace["hops"].append({"stage": stage, "ts": time.time()})
+
+    def send_voice_to_app_server(self, text, trace=None):
         """음성 인식 결과를 앱서버로 전송[1]"""
+        trace = trace or self.new_trace('voice')
+
         def send_async():
             try:
+                self.add_trace_hop(trace, 'pi_send')
                 response = requests.post(
                     f"{self.app_server_url}/voice",
                     json={
                         "recognized_text": text,
                         "timestamp": time.time(),
-                        "source": "raspberry_pi",
-                        "loop_mode": True
+                        "source": self.device_id,
+                        "loop_mode": True,
+                        "trace_id": trace["id"],
+                        "trace": trace
                     },
                     timeout=5
                 )
                 if response.status_code == 200:
-                    print(f"📤 앱서버 전송 완료: {text}")
+                    self.log.info("📤 앱서버 전송 완료: %s", text)
                 else:
-                    print(f"⚠️ 앱서버 응답 오류: {response.status_code}")
+                    metrics.inc('send_errors', target='app_server')
+                    self.log.warning("⚠️ 앱서버 응답 오류: %s", response.status_code)
             except Exception as e:
-                print(f"❌ 앱서버 전송 실패: {e}")
+                metrics.inc('send_errors', target='app_server')
+                self.log.error("❌ 앱서버 전송 실패: %s", e)
 
         threading.Thread(target=send_async, daemon=True).start()
 
@@ -380,7 +473,8 @@ class VoiceStopGestureRecognizer:
 
                 if current_time - self.last_print_time >= self.print_interval:
                     remaining_time = self.measuring_duration - elapsed
-                    print(f"📊 초기: {self.initial_distance:.2f}px | 현재: {current_distance:.2f}px | 차이: {distance_diff:.2f}px | 남은시간: {remaining_time:.1f}s")
+                    self.log.info("📊 초기: %.2fpx | 현재: %.2fpx | 차이: %.2fpx | 남은시간: %.1fs",
+                                  self.initial_distance, current_distance, distance_diff, remaining_time)
                     self.last_print_time = current_time
 
                 if current_time - self.last_send_time >= self.send_interval:
@@ -388,29 +482,45 @@ class VoiceStopGestureRecognizer:
                     self.last_send_time = current_time
 
         except Exception as e:
-            print(f"❌ 거리 측정 오류: {e}")
+            self.log.error("❌ 거리 측정 오류: %s", e)
 
     def send_distance_to_web_server(self, distance_diff, current_distance, initial_distance, elapsed_time):
         """거리 측정 결과를 웹서버로 전송[1]"""
+        if self.distance_sender is not None:
+            # UDP: 연결/응답 대기가 없으므로 스레드 없이 바로 전송, 송신 시각이 추적 시작점
+            try:
+                with metrics.timer('send_distance', transport='udp'):
+                    self.distance_sender.send(current_distance, initial_distance, elapsed_time)
+            except OSError:
+                metrics.inc('send_errors', target='web_server')
+            return
+
+        trace = self.new_trace('distance')
+
         def send_async():
             try:
-                response = requests.post(
-                    f"{self.web_server_url}/distance",
-                    json={
-                        "distance_difference": distance_diff,
-                        "current_distance": current_distance,
-                        "initial_distance": initial_distance,
-                        "elapsed_time": elapsed_time,
-                        "timestamp": time.time(),
-                        "source": "raspberry_pi",
-                        "unit": "pixels"
-                    },
-                    timeout=2
-                )
+                self.add_trace_hop(trace, 'pi_send')
+                with metrics.timer('send_distance', transport='http'):
+                    response = requests.post(
+                        f"{self.web_server_url}/distance",
+                        json={
+                            "distance_difference": distance_diff,
+                            "current_distance": current_distance,
+                            "initial_distance": initial_distance,
+                            "elapsed_time": elapsed_time,
+                            "timestamp": time.time(),
+                            "source": self.device_id,
+                            "unit": "pixels",
+                            "trace_id": trace["id"],
+                            "trace": trace
+                        },
+                        timeout=2
+                    )
                 if response.status_code != 200:
-                    print(f"⚠️ 웹서버 응답 오류: {response.status_code}")
+                    metrics.inc('send_errors', target='web_server')
+                    self.log.warning("⚠️ 웹서버 응답 오류: %s", response.status_code)
             except Exception:
-                pass
+                metrics.inc('send_errors', target='web_server')
 
         threading.Thread(target=send_async, daemon=True).start()
 
@@ -433,6 +543,9 @@ class VoiceStopGestureRecognizer:
 
     def run(self):
         """메인 실행 - Flask 서버와 제스처 인식 동시 실행[3]"""
+        # 추론 워커는 스레드 생성 전에 띄움
+        self.start_hand_worker()
+
         # Flask 서버 시작
         self.start_flask_server()
 
@@ -462,30 +575,9 @@ class VoiceStopGestureRecognizer:
                     break
 
                 frame_count += 1
-
-                # 모션 인식 모드에서만 제스처 감지
-                if self.mode == 'motion' and frame_count % 3 == 0:
-                    landmarks = self.extract_landmarks(frame)
-                    detected_gesture = self.recognize_gesture(landmarks)
-
-                    if detected_gesture and detected_gesture != current_gesture:
-                        current_gesture = detected_gesture
-                        print(f"🎯 제스처 감지: {detected_gesture}")
-                        time.sleep(0.2)
-                        self.execute_gesture(detected_gesture)
-
-                    # 거리 측정 처리
-                    self.process_timed_distance_measurement(landmarks)
-
-                    if detected_gesture is None:
-                        current_gesture = None
-
-                # 음성 모드 상태 확인
-                elif self.mode == 'voice':
-                    if not self.voice_loop_active:
-                        self.mode = 'motion'
-                        print("📋 현재 모드: 모션 인식")
-                        time.sleep(0.2)
+                metrics.inc('frames')
+                with profiler.profiled(), metrics.timer('main_loop'):
+                    current_gesture = self.process_frame(frame, frame_count, current_gesture)
 
                 time.sleep(0.01)
 
@@ -497,6 +589,35 @@ class VoiceStopGestureRecognizer:
             self.stop()
             cap.release()
 
+    def process_frame(self, frame, frame_count, current_gesture):
+        """프레임 1장 처리 (메인 루프 한 바퀴), 갱신된 current_gesture 반환"""
+        # 워커 추론 결과 회수 (모션 모드가 아니면 버림)
+        if self.hand_worker is not None:
+            if not self.hand_worker.is_alive():
+                self.log.warning("⚠️ 추론 워커 종료 감지, 인라인 모드로 전환")
+                self.fallback_to_inline()
+            else:
+                metrics.set('hand_worker_dropped_frames', self.hand_worker.dropped_frames)
+                for _, landmarks in self.hand_worker.poll():
+                    if self.mode == 'motion':
+                        current_gesture = self.handle_landmarks(landmarks, current_gesture)
+
+        # 모션 인식 모드에서만 제스처 감지
+        if self.mode == 'motion' and frame_count % 3 == 0:
+            if self.hand_worker is not None:
+                self.hand_worker.submit(frame)
+            else:
+                landmarks = self.extract_landmarks(frame)
+                current_gesture = self.handle_landmarks(landmarks, current_gesture)
+
+        # 음성 모드 상태 확인
+        elif self.mode == 'voice':
+            if not self.voice_loop_active:
+                self.mode = 'motion'
+                self.log.info("📋 현재 모드: 모션 인식")
+                time.sleep(0.2)
+        return current_gesture
+
     def stop(self):
         """시스템 정지"""
         self.running = False
@@ -506,7 +627,15 @@ class VoiceStopGestureRecognizer:
         with self.measurement_lock:
             self.measuring_active = False
 
-        self.hands.close()
+        if self.hand_worker is not None:
+            self.hand_worker.stop()
+            self.hand_worker = None
+        if self.hands is not None:
+            self.hands.close()
+            self.hands = None
+        if self.distance_sender is not None:
+            self.distance_sender.close()
+            self.distance_sender = None
         print("🔚 HTTP 음성 중지 신호 + 제스처 인식기 종료")
 
 # 메인 실행
@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify
-from app.services.memory_store import distance_state, server_log
+from app.services.memory_store import DEFAULT_SOURCE
+from app.services.state_backend import get_backend
 from app.services.logger import log_api
+from app.services.tracing import traces, trace_from_payload
+from app.services.instrumentation import metrics
+import math
 import time
 
 bp = Blueprint('distance', __name__, url_prefix='/api')
@@ -8,19 +12,74 @@ bp = Blueprint('distance', __name__, url_prefix='/api')
 @bp.route('/distance', methods=['POST'])
 def receive_distance():
     data = request.get_json()
-    distance_state.update({
+    record_distance(data, trace_from_payload(data, 'distance'), '/api/distance')
+    return jsonify({"status": "ok"}), 200
+
+
+def record_distance(data, trace=None, endpoint='/api/distance'):
+    """거리 샘플 저장 (HTTP /api/distance, UDP 수신 공용)"""
+    if trace:
+        traces.hop(trace, 'web_received')
+    source = data.get('source') or DEFAULT_SOURCE
+    store = get_backend()
+
+    state = {
         'current_distance': data.get('current_distance'),
         'initial_distance': data.get('initial_distance'),
         'distance_difference': data.get('distance_difference'),
         'elapsed_time': data.get('elapsed_time'),
-        'source': data.get('source'),
+        'source': source,
         'timestamp': time.time()
-    })
+    }
+    with metrics.timer('distance_store'):
+        store.update_distance(source, state)
     msg = (
-        f"{distance_state.get('current_distance'):.2f}px "
-        f"(Δ{distance_state.get('distance_difference'):.2f}px)"
+        f"{state['current_distance']:.2f}px "
+        f"(Δ{state['distance_difference']:.2f}px)"
     )
-    server_log.append(f"distance: {msg}")
-    log_api('/api/distance')
+    store.log(source, f"distance: {msg}")
+    log_api(endpoint)
+    if trace:
+        traces.hop(trace, 'web_stored')
+        traces.record(trace, source)
 
-    return jsonify({"status": "ok"}), 200
+
+def receive_distance_datagram(sample):
+    """UDP 거리 샘플 (distance_udp.decode 결과) - 송신 시각으로 최소 추적 생성"""
+    record_distance(sample, trace_from_payload(sample, 'distance'), 'udp:distance')
+
+
+@bp.route('/distance/history', methods=['GET'])
+def distance_history_view():
+    store = get_backend()
+    source = request.args.get('source')
+    if not source:
+        return jsonify({
+            'status': 'error',
+            'message': 'source 파라미터가 필요합니다.',
+            'sources': store.history_sources()
+        }), 400
+
+    try:
+        to = float(request.args.get('to', time.time()))
+        frm = float(request.args.get('from', to - 300))
+        step = float(request.args.get('step', 1))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'from/to/step 은 숫자여야 합니다.'}), 400
+    if not all(math.isfinite(v) for v in (frm, to, step)):
+        return jsonify({'status': 'error', 'message': 'from/to/step 은 유한한 숫자여야 합니다.'}), 400
+    if step <= 0:
+        return jsonify({'status': 'error', 'message': 'step 은 0보다 커야 합니다.'}), 400
+
+    windows = store.distance_history(source, frm, to, step)
+    if windows is None:
+        return jsonify({'status': 'error', 'message': '해당 source 의 기록이 없습니다.'}), 404
+
+    log_api('/api/distance/history')
+    return jsonify({
+        'status': 'ok',
+        'source': source,
+        'from': frm,
+        'to': to,
+        'windows': windows
+    }), 200
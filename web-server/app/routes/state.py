@@ -1,17 +1,26 @@
-from flask import Blueprint, jsonify, send_from_directory, current_app
-from app.services.memory_store import distance_state, schedule_list, api_log, server_log
+from flask import Blueprint, jsonify, request, send_from_directory, current_app
+from app.services.state_backend import get_backend
+from app.services.tracing import traces
+from app.services.instrumentation import metrics
 
 # 📦 /api/state 라우트용 Blueprint
 api_bp = Blueprint('api_state', __name__, url_prefix='/api')
 
 @api_bp.route('/state', methods=['GET'])
 def get_state():
-    return jsonify({
-        'distance': distance_state,
-        'schedule': schedule_list,
-        'api_log': api_log,
-        'logs': server_log
-    })
+    # ?source= 로 특정 장치만 조회
+    store = get_backend()
+    source = request.args.get('source')
+    if source and source not in store.sources():
+        return jsonify({'status': 'error', 'message': '해당 장치가 없습니다.'}), 404
+    with metrics.timer('get_state_snapshot'):
+        state = store.snapshot(source)
+    # 대시보드가 가져간 시점을 추적의 마지막 구간으로 기록 (추적 실패가 응답을 막지 않도록)
+    try:
+        traces.mark_polled(source)
+    except Exception as e:
+        print(f"⚠️ 추적 기록 실패: {e}")
+    return jsonify(state)
 
 
 # 📦 / (루트) 정적 파일 제공용 Blueprint
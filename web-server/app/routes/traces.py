@@ -0,0 +1,15 @@
+from flask import Blueprint, request, jsonify
+from app.services.tracing import traces
+
+bp = Blueprint('traces', __name__, url_prefix='/api')
+
+@bp.route('/traces', methods=['GET'])
+def get_traces():
+    # ?kind=voice|distance 로 종류별 조회, ?limit= 최근 추적 개수
+    kind = request.args.get('kind')
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'limit 은 숫자여야 합니다.'}), 400
+
+    return jsonify(traces.summary(kind, limit))
@@ -1,61 +1,73 @@
 from flask import Blueprint, request, jsonify
-from app.services.memory_store import schedule_list, server_log
+from app.services.memory_store import DEFAULT_SOURCE
+from app.services.state_backend import get_backend
 from app.services.logger import log_api
+from app.services.tracing import traces, trace_from_payload
+from app.services.instrumentation import get_logger
+
+log = get_logger('web-server.voice')
 
 bp = Blueprint('voice_result', __name__, url_prefix='/api')
 
 @bp.route('/voice-result', methods=['POST'])
 def receive_voice_result():
     data = request.get_json()
+    trace = trace_from_payload(data, 'voice')
+    if trace:
+        traces.hop(trace, 'web_received')
     data_type = data.get("type")
+    source = data.get("source") or DEFAULT_SOURCE
+    store = get_backend()
 
     if data_type == "add":
-        print("[웹서버] 일정 추가 수신:")
-        print(data.get("data"))
-        schedule_list.append(data.get("data"))
-        server_log.append("schedule added")
+        log.info("[웹서버] 일정 추가 수신: %s", data.get("data"))
+        if isinstance(data.get("data"), dict):
+            store.add_schedule(source, data.get("data"))
+        store.log(source, "schedule added")
 
     elif data_type == "view":
-        print("[웹서버] 일정 조회 결과 수신:")
+        log.info("[웹서버] 일정 조회 결과 수신: %d건", len(data.get("data", [])))
         for entry in data.get("data", []):
-            print(entry)
-        schedule_list[:] = data.get("data", [])
-        server_log.append("schedule view")
+            log.debug("%s", entry)
+        # 전체 교체 대신 id 기준 차이만 반영
+        changes = store.replace_schedules(source, data.get("data", []))
+        store.log(source, f"schedule view (+{changes['added']} ~{changes['updated']} -{changes['removed']})")
 
     elif data_type == "exit":
-        print("[웹서버] 종료 명령 수신:")
-        print(data.get("message"))
-        server_log.append("exit")
+        log.info("[웹서버] 종료 명령 수신: %s", data.get("message"))
+        store.log(source, "exit")
 
     else:
-        print("[웹서버] 알 수 없는 타입의 데이터 수신:", data)
-        server_log.append("unknown data")
+        log.warning("[웹서버] 알 수 없는 타입의 데이터 수신: %s", data)
+        store.log(source, "unknown data")
 
     log_api('/api/voice-result')
-    if len(server_log) > 50:
-        del server_log[0]
+    if trace:
+        traces.hop(trace, 'web_stored')
+        traces.record(trace, source)
 
     return jsonify({"status": "ok", "message": "Voice result received"}), 200
 
 @bp.route('/delete', methods=['POST'])
 def delete_schedule():
-    from app.services.memory_store import schedule_list
     data = request.get_json()
+    schedule_id = data.get('id')
     title = data.get('title')
+    source = data.get('source')
 
-    if not title:
-        return jsonify({'status': 'error', 'message': '제목이 필요합니다.'}), 400
+    if schedule_id is None and not title:
+        return jsonify({'status': 'error', 'message': '일정 id 또는 제목이 필요합니다.'}), 400
 
-    # 일정 제거
-    original_len = len(schedule_list)
-    schedule_list[:] = [s for s in schedule_list if s.get('이름') != title and s.get('title') != title]
-    
-    if len(schedule_list) == original_len:
+    # id 가 있으면 id 로, 없으면 제목으로 삭제 (source 가 없으면 사본을 가진 모든 장치에서 제거)
+    store = get_backend()
+    removed_from = store.delete_schedule(title, source, schedule_id)
+    if not removed_from:
         return jsonify({'status': 'error', 'message': '일정이 존재하지 않습니다.'}), 404
 
-    from app.services.logger import log_api
-    from app.services.memory_store import server_log
-    server_log.append(f"일정 삭제됨: {title}")
+    label = title or schedule_id
+    # 실제로 일정이 있던 장치에만 기록 (없는 기본 장치를 새로 만들지 않음)
+    for removed_source in removed_from:
+        store.log(removed_source, f"일정 삭제됨: {label}")
     log_api('/api/delete')
 
-    return jsonify({'status': 'ok', 'message': f'{title} 삭제됨'}), 200
+    return jsonify({'status': 'ok', 'message': f'{label} 삭제됨'}), 200
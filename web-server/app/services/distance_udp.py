@@ -0,0 +1,97 @@
+"""
+거리 샘플 UDP 전송 형식 (respberry.py 송신, 웹서버 수신 공용)
+- 고정 40바이트 데이터그램, 네트워크 바이트 순서
+  source(16B, UTF-8, 0 패딩) | seq(uint32) | timestamp(double) | current, initial, elapsed(float32)
+- distance_difference 는 current - initial 로 수신측에서 계산
+- 손실/순서 뒤바뀜 허용: 최신 샘플만 의미가 있으므로 재전송하지 않고 늦게 온 패킷은 버림
+- 원본: 저장소 루트 distance_udp.py, 사본: web-server/app/services/distance_udp.py (웹서버 단독 배포용)
+  python check_vendored.py 로 일치 확인, --fix 로 원본을 사본에 복사
+"""
+import socket
+import struct
+import threading
+import time
+
+PACKET = struct.Struct('!16sIdfff')
+SOURCE_BYTES = 16
+SEQ_MOD = 1 << 32
+
+
+def encode_source(source):
+    """
+    source 를 UTF-8 로 인코딩, SOURCE_BYTES 를 넘으면 ValueError
+    (잘라서 보내면 HTTP 로 오는 같은 장치의 데이터와 다른 source 로 저장됨)
+    """
+    raw = source.encode('utf-8')
+    if len(raw) > SOURCE_BYTES:
+        raise ValueError(f"source 는 UTF-8 {SOURCE_BYTES}바이트 이하여야 합니다: {source!r} ({len(raw)}바이트)")
+    return raw
+
+
+def encode(source, seq, timestamp, current, initial, elapsed):
+    raw = encode_source(source)
+    return PACKET.pack(raw, seq % SEQ_MOD, timestamp, current, initial, elapsed)
+
+
+def decode(data):
+    """데이터그램 -> dict, 크기가 맞지 않으면 ValueError"""
+    if len(data) != PACKET.size:
+        raise ValueError(f"잘못된 패킷 크기: {len(data)}")
+    raw, seq, timestamp, current, initial, elapsed = PACKET.unpack(data)
+    return {
+        'source': raw.rstrip(b'\0').decode('utf-8', 'ignore'),
+        'seq': seq,
+        'timestamp': timestamp,
+        'current_distance': current,
+        'initial_distance': initial,
+        'distance_difference': current - initial,
+        'elapsed_time': elapsed
+    }
+
+
+class SequenceFilter:
+    """
+    source 별 마지막 seq 보다 오래된(늦게 도착한/중복) 패킷을 버림
+    - seq 비교는 uint32 순환(serial number) 기준
+    - reorder_window 보다 크게 뒤로 가거나 reset_after 초 동안 소식이 없으면 송신측 재시작으로 보고 다시 받음
+    """
+
+    def __init__(self, reorder_window=1024, reset_after=5.0):
+        self.reorder_window = reorder_window
+        self.reset_after = reset_after
+        self.last = {}
+
+    def accept(self, source, seq, now=None):
+        now = time.monotonic() if now is None else now
+        previous = self.last.get(source)
+        if previous is not None and now - previous[1] < self.reset_after:
+            behind = (previous[0] - seq) % SEQ_MOD
+            if behind < self.reorder_window:
+                # 0: 중복, 그 외: 이미 더 새로운 샘플을 받음
+                return False
+        self.last[source] = (seq, now)
+        return True
+
+
+class DistanceSender:
+    """라즈베리파이용 UDP 송신기 (연결 없음, sendto 는 블로킹되지 않음)"""
+
+    def __init__(self, host, port, source):
+        encode_source(source)
+        self.address = (host, int(port))
+        self.source = source
+        self.seq = 0
+        self.lock = threading.Lock()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, current, initial, elapsed, timestamp=None):
+        with self.lock:
+            self.seq = (self.seq + 1) % SEQ_MOD
+            seq = self.seq
+        data = encode(self.source, seq, time.time() if timestamp is None else timestamp,
+                      current, initial, elapsed)
+        self.sock.sendto(data, self.address)
+        return seq
+
+    def close(self):
+        self.sock.close()
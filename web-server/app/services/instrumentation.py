@@ -0,0 +1,400 @@
+"""
+공용 경량 계측 모듈 (respberry.py, app_server.py, web-server 공통)
+- metrics: 단조 시계(perf_counter) 기반 타이머 + 카운터 + 게이지, /metrics 텍스트 출력
+- profiler: 시간 제한 프로파일 캡처 (sampling: 전체 스레드 스택 샘플링, cprofile: 계측 구간 cProfile)
+- get_logger: 레벨 + 속도 제한 로거 (핫 패스 print 대체)
+- install_flask: Flask 앱에 요청 타이머, /metrics, /debug/profile 등록
+- 원본: 저장소 루트 instrumentation.py, 사본: web-server/app/services/instrumentation.py (웹서버 단독 배포용)
+  python check_vendored.py 로 일치 확인, --fix 로 원본을 사본에 복사
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+__all__ = ['metrics', 'profiler', 'get_logger', 'install_flask', 'Metrics', 'ProfileCapture']
+
+
+# ========== 메트릭 ==========
+class _Timer:
+    __slots__ = ('count', 'total', 'max', 'last')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+
+def _escape_label(value):
+    """Prometheus 레이블 값 이스케이프 (\\, \", 줄바꿈)"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    """
+    프로세스 단위 메트릭 저장소
+    - 키는 (이름, 레이블 튜플), 레이블은 endpoint 처럼 종류가 적은 값만 사용
+    """
+
+    def __init__(self, prefix=''):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.timers = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted(labels.items())) if labels else ())
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        self.gauges[self._key(name, labels)] = value
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            timer = self.timers.get(key)
+            if timer is None:
+                timer = self.timers[key] = _Timer()
+            timer.count += 1
+            timer.total += seconds
+            timer.last = seconds
+            if seconds > timer.max:
+                timer.max = seconds
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def timed(self, name=None, **labels):
+        """함수 실행 시간 측정 데코레이터"""
+        def decorator(func):
+            metric = name or func.__name__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(metric, time.perf_counter() - started, **labels)
+            return wrapper
+        return decorator
+
+    def render(self):
+        """Prometheus 텍스트 형식"""
+        def fmt(name, labels, suffix=''):
+            full = f"{self.prefix}{name}{suffix}"
+            if not labels:
+                return full
+            inner = ','.join(f'{k}="{_escape_label(v)}"' for k, v in labels)
+            return f"{full}{{{inner}}}"
+
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            timers = sorted((k, (t.count, t.total, t.max, t.last)) for k, t in self.timers.items())
+        gauges = sorted(self.gauges.items())
+
+        for (name, labels), value in counters:
+            lines.append(f"{fmt(name, labels, '_total')} {value}")
+        for (name, labels), value in gauges:
+            lines.append(f"{fmt(name, labels)} {value}")
+        for (name, labels), (count, total, maximum, last) in timers:
+            lines.append(f"{fmt(name, labels, '_seconds_count')} {count}")
+            lines.append(f"{fmt(name, labels, '_seconds_sum')} {total:.6f}")
+            lines.append(f"{fmt(name, labels, '_seconds_max')} {maximum:.6f}")
+            lines.append(f"{fmt(name, labels, '_seconds_last')} {last:.6f}")
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+# ========== 프로파일러 ==========
+class ProfileCapture:
+    """
+    시간 제한 프로파일 캡처 (한 번에 하나)
+    - sampling: 백그라운드 스레드가 sys._current_frames() 로 모든 스레드 스택 수집
+      -> folded stack 텍스트 (speedscope / flamegraph.pl 에서 열 수 있음)
+    - cprofile: profiled() 로 감싼 구간(요청 처리, 메인 루프 등)에서만 cProfile 실행
+      -> .prof 바이너리 (snakeviz, pstats 로 열 수 있음)
+    """
+
+    MAX_SECONDS = 120
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.mode = None
+        self.deadline = 0.0
+        self.started_at = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._stacks = Counter()
+        self._profiles = []
+        self.result = None
+
+    @property
+    def active(self):
+        return self.mode is not None
+
+    def start(self, seconds=10.0, mode='sampling', interval=0.005):
+        if mode not in ('sampling', 'cprofile'):
+            raise ValueError(f"알 수 없는 프로파일 모드: {mode}")
+        seconds = min(float(seconds), self.MAX_SECONDS)
+        with self.lock:
+            if self.active:
+                raise RuntimeError("이미 프로파일링 중입니다.")
+            self.mode = mode
+            self.started_at = time.time()
+            self.deadline = time.monotonic() + seconds
+            self.result = None
+            self._stacks = Counter()
+            self._profiles = []
+            self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), daemon=True)
+        self._thread.start()
+        return seconds
+
+    def stop(self):
+        """캡처 조기 종료 후 결과 반환"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        return self.result
+
+    def _run(self, interval):
+        me = threading.get_ident()
+        while not self._stop.is_set() and time.monotonic() < self.deadline:
+            if self.mode == 'sampling':
+                for ident, frame in sys._current_frames().items():
+                    if ident != me:
+                        self._stacks[self._fold(frame)] += 1
+                self._stop.wait(interval)
+            else:
+                self._stop.wait(min(0.1, max(self.deadline - time.monotonic(), 0)))
+        self._finish()
+
+    @staticmethod
+    def _fold(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def _finish(self):
+        with self.lock:
+            mode, self.mode = self.mode, None
+            stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))
+            if mode == 'sampling':
+                body = ''.join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+                self.result = (body.encode('utf-8'), f"profile-{stamp}.folded", 'text/plain')
+            else:
+                profiles, self._profiles = self._profiles, []
+                if not profiles:
+                    self.result = (b'', f"profile-{stamp}.prof", 'application/octet-stream')
+                    return
+                stats = pstats.Stats(profiles[0], stream=io.StringIO())
+                for p in profiles[1:]:
+                    stats.add(p)
+                with tempfile.NamedTemporaryFile(suffix='.prof', delete=False) as f:
+                    path = f.name
+                try:
+                    stats.dump_stats(path)
+                    with open(path, 'rb') as f:
+                        self.result = (f.read(), f"profile-{stamp}.prof", 'application/octet-stream')
+                finally:
+                    os.remove(path)
+
+    @contextmanager
+    def profiled(self):
+        """cprofile 캡처 중이면 이 구간을 cProfile 로 측정 (아니면 비용 거의 없음)"""
+        if self.mode != 'cprofile':
+            yield
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ (sys.monitoring) 는 프로세스에 프로파일러 하나만 허용
+            # -> 다른 스레드가 이미 측정 중이면 이 구간은 건너뜀
+            metrics.inc('profile_sections_skipped')
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self.lock:
+                if self.mode == 'cprofile':
+                    self._profiles.append(profile)
+
+    def status(self):
+        return {
+            'active': self.active,
+            'mode': self.mode,
+            'remaining_s': max(self.deadline - time.monotonic(), 0) if self.active else 0,
+            'result_ready': self.result is not None
+        }
+
+
+profiler = ProfileCapture()
+
+
+# ========== 로거 ==========
+class RateLimitFilter(logging.Filter):
+    """
+    같은 메시지 템플릿(record.msg)이 interval 초 안에 burst 회를 넘으면 버림
+    - 버린 횟수는 다음에 통과하는 기록에 덧붙임
+    """
+
+    def __init__(self, burst=5, interval=1.0):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.windows = {}
+
+    def filter(self, record):
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self.lock:
+            start, count, dropped = self.windows.get(key, (now, 0, 0))
+            if now - start >= self.interval:
+                start, count = now, 0
+            if count >= self.burst:
+                self.windows[key] = (start, count, dropped + 1)
+                metrics.inc('log_suppressed')
+                return False
+            self.windows[key] = (start, count + 1, 0)
+        if dropped:
+            record.msg = f"{record.msg} (+{dropped}건 생략)"
+        return True
+
+
+def get_logger(name):
+    """
+    LOG_LEVEL(기본 INFO), LOG_RATE_BURST/LOG_RATE_INTERVAL 로 제어되는 로거
+    - 메시지 템플릿별 속도 제한이 걸리므로 핫 패스에서는 %-형식 인자 사용
+    """
+    logger = logging.getLogger(name)
+    if not getattr(logger, '_instrumented', False):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        handler.addFilter(RateLimitFilter(
+            burst=int(os.getenv('LOG_RATE_BURST', 5)),
+            interval=float(os.getenv('LOG_RATE_INTERVAL', 1.0))
+        ))
+        logger.addHandler(handler)
+        logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+        logger.propagate = False
+        logger._instrumented = True
+    return logger
+
+
+# ========== Flask 연동 ==========
+def worker_count():
+    """
+    같은 포트를 나눠 받는 프로세스 수 (gunicorn 실행 시 run.py 가 INSTRUMENT_WORKERS 로 전달)
+    - 메트릭/프로파일러는 프로세스별 상태이므로 2 이상이면 요청마다 다른 워커가 응답함
+    """
+    return int(os.getenv('INSTRUMENT_WORKERS', 1))
+
+
+def install_flask(app, service):
+    """
+    요청 타이머, cprofile 구간, /metrics, /debug/profile 등록
+    - 멀티 워커(INSTRUMENT_WORKERS > 1)에서는 두 엔드포인트 모두 409 로 거절
+      (시작/다운로드나 스크랩이 임의의 워커로 가서 결과가 맞지 않음 -> 워커 1개로 실행해서 측정)
+    """
+    from flask import Response, g, jsonify, request
+
+    def _multi_worker():
+        if worker_count() <= 1:
+            return None
+        return jsonify({
+            'status': 'error',
+            'message': f'워커 {worker_count()}개 실행 중: 메트릭/프로파일은 워커별 상태라 지원하지 않습니다. '
+                       'WEB_WORKERS=1 로 실행해서 측정하세요.'
+        }), 409
+
+    metrics.set('service_info', 1, service=service)
+
+    @app.before_request
+    def _instrument_start():
+        g._instrument_started = time.perf_counter()
+        if profiler.mode == 'cprofile':
+            g._instrument_profile = profiler.profiled()
+            g._instrument_profile.__enter__()
+
+    @app.teardown_request
+    def _instrument_end(exc):
+        profile = g.pop('_instrument_profile', None)
+        if profile is not None:
+            profile.__exit__(None, None, None)
+        started = g.pop('_instrument_started', None)
+        if started is not None:
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.observe('http_request', time.perf_counter() - started, endpoint=endpoint)
+
+    @app.route('/metrics', methods=['GET'])
+    def _metrics():
+        refused = _multi_worker()
+        if refused:
+            return refused
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/debug/profile', methods=['GET', 'POST'])
+    def _profile():
+        """
+        POST ?action=start&seconds=10&mode=sampling|cprofile : 캡처 시작
+        POST ?action=stop : 조기 종료
+        GET : 상태 조회, 결과가 있으면 ?download=1 로 파일 받기
+        """
+        refused = _multi_worker()
+        if refused:
+            return refused
+        if request.method == 'POST':
+            action = request.args.get('action', 'start')
+            if action == 'stop':
+                profiler.stop()
+                return jsonify(profiler.status()), 200
+            try:
+                seconds = profiler.start(
+                    seconds=float(request.args.get('seconds', 10)),
+                    mode=request.args.get('mode', 'sampling')
+                )
+            except ValueError as e:
+                return jsonify({'status': 'error', 'message': str(e)}), 400
+            except RuntimeError as e:
+                return jsonify({'status': 'error', 'message': str(e)}), 409
+            return jsonify({'status': 'ok', 'seconds': seconds, **profiler.status()}), 200
+
+        if request.args.get('download'):
+            if profiler.result is None:
+                return jsonify({'status': 'error', 'message': '프로파일 결과가 없습니다.', **profiler.status()}), 404
+            body, filename, mimetype = profiler.result
+            return Response(body, mimetype=mimetype,
+                            headers={'Content-Disposition': f'attachment; filename={filename}'})
+        return jsonify(profiler.status()), 200
@@ -1,7 +1,5 @@
-from app.services.memory_store import api_log
+from app.services.state_backend import get_backend
 import time
 
 def log_api(endpoint, status=200):
-    api_log.append({'endpoint': endpoint, 'status': status, 'timestamp': time.time()})
-    if len(api_log) > 20:
-        del api_log[0]
+    get_backend().log_api({'endpoint': endpoint, 'status': status, 'timestamp': time.time()})
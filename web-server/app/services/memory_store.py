@@ -1,4 +1,77 @@
-distance_state = {}
-schedule_list = []
-server_log = []
-api_log = []
+import heapq
+import threading
+import time
+from collections import deque
+
+from app.services.schedule_index import ScheduleIndex
+
+# source 가 없는 요청은 기존 단일 라즈베리파이로 간주
+DEFAULT_SOURCE = 'raspberry_pi'
+SERVER_LOG_LIMIT = 50
+API_LOG_LIMIT = 20
+
+
+class DeviceState:
+    """장치(source) 하나의 상태 - 장치별 락으로 다른 장치와 경합 없음"""
+
+    def __init__(self, source):
+        self.source = source
+        self.lock = threading.Lock()
+        self.distance = {}
+        self.schedules = ScheduleIndex()
+        self.logs = deque(maxlen=SERVER_LOG_LIMIT)
+
+    def log(self, message, ts=None):
+        with self.lock:
+            self.logs.append((time.time() if ts is None else ts, message))
+
+    def log_entries(self):
+        """(ts, message) 목록 복사본 - 순회 중 다른 스레드가 추가하면 deque 가 RuntimeError 를 냄"""
+        with self.lock:
+            return list(self.logs)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'source': self.source,
+                'distance': self.distance,
+                'schedule': self.schedules.items(),
+                'logs': [message for _, message in self.logs]
+            }
+
+
+class DeviceRegistry:
+    """source -> DeviceState, 락은 장치 생성 시에만 사용"""
+
+    def __init__(self):
+        self._devices = {}
+        self._lock = threading.Lock()
+
+    def get(self, source, create=False):
+        device = self._devices.get(source)
+        if device is None and create:
+            with self._lock:
+                device = self._devices.setdefault(source, DeviceState(source))
+        return device
+
+    def all(self):
+        return list(self._devices.values())
+
+    def sources(self):
+        return list(self._devices.keys())
+
+    def merged_logs(self, limit=SERVER_LOG_LIMIT):
+        """전체 장치 로그를 시간순으로 병합 (최근 limit 개)"""
+        streams = [device.log_entries() for device in self.all()]
+        merged = list(heapq.merge(*streams, key=lambda entry: entry[0]))
+        return [message for _, message in merged[-limit:]]
+
+    def latest_distance(self):
+        """가장 최근에 갱신된 장치의 거리 상태"""
+        latest = {}
+        for device in self.all():
+            distance = device.distance
+            if distance.get('timestamp', 0) > latest.get('timestamp', 0):
+                latest = distance
+        return latest
+
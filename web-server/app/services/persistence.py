@@ -0,0 +1,293 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from app.services.schedule_index import ScheduleIndex
+from app.services.state_backend import MemoryBackend
+
+SNAPSHOT_FILE = 'state.snapshot.json'
+LOG_FILE = 'mutations.log'
+
+
+class MutationLog:
+    """
+    추가 전용(append-only) 변경 로그
+    - 한 줄에 JSON 하나: {"seq": N, "op": "...", "args": [...]}
+    - fsync_interval > 0 이면 백그라운드 스레드가 모아서 fsync (배치)
+      스레드는 fork 를 넘지 못하므로 실제로 기록하는 프로세스에서 첫 기록 시 시작
+      fsync 는 append 락 밖에서 실행 (느린 SD 카드에서도 요청 경로는 flush 까지만 대기)
+    - fsync_interval == 0 이면 매 기록마다 fsync
+    """
+
+    def __init__(self, path, fsync_interval=0.05):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.file = open(path, 'a', encoding='utf-8')
+        self.lock = threading.Lock()
+        # fsync 와 파일 교체(rotate/close)의 순서 보장 (append 는 이 락을 잡지 않음)
+        self._sync_lock = threading.Lock()
+        self.dirty = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+
+    def _ensure_sync_thread(self):
+        if self._thread_pid != os.getpid():
+            self._thread_pid = os.getpid()
+            self._thread = threading.Thread(target=self._sync_loop, daemon=True)
+            self._thread.start()
+
+    def append(self, line):
+        with self.lock:
+            self.file.write(line + '\n')
+            if self.fsync_interval > 0:
+                self._ensure_sync_thread()
+                self.dirty = True
+            else:
+                self._sync_locked()
+
+    def _sync_locked(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.dirty = False
+
+    def sync(self):
+        with self._sync_lock:
+            with self.lock:
+                if not self.dirty or self.file.closed:
+                    return
+                self.file.flush()
+                self.dirty = False
+                fd = self.file.fileno()
+            os.fsync(fd)
+
+    def _sync_loop(self):
+        while not self._stop.wait(self.fsync_interval):
+            self.sync()
+
+    def rotate(self, rotated_path):
+        """현재 로그를 rotated_path 로 넘기고 새 로그 파일로 교체"""
+        with self._sync_lock, self.lock:
+            self._sync_locked()
+            self.file.close()
+            os.replace(self.path, rotated_path)
+            self.file = open(self.path, 'a', encoding='utf-8')
+        return rotated_path
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None and self._thread_pid == os.getpid():
+            self._thread.join(timeout=1)
+        with self._sync_lock, self.lock:
+            if not self.file.closed:
+                self._sync_locked()
+                self.file.close()
+
+
+class PersistentMemoryBackend(MemoryBackend):
+    """
+    메모리 저장소 + 스냅샷/변경 로그 영속화
+    - 변경 요청(거리, 일정, 로그)은 메모리에 반영한 뒤 로그에 한 줄 추가
+    - snapshot_every 회마다 백그라운드에서 압축 스냅샷 저장 후 로그 교체
+    - 시작 시 스냅샷 + 스냅샷 이후 seq 의 로그만 재생
+    - 변경 순서는 source 별 락으로만 맞춤 (다른 장치의 요청끼리는 서로 기다리지 않음)
+      전역 _lock 은 seq 부여 + 로그 추가 순서에만 사용, 스냅샷은 모든 source 락을 잡아 일관된 시점 확보
+    - 스냅샷/종료 처리는 소유 프로세스에서만: 생성한 프로세스, fork 후에는 실제로 기록한 프로세스
+      (기록하지 않은 쪽의 사본은 오래된 상태이므로 스냅샷하면 다른 프로세스의 변경을 덮어씀)
+    """
+
+    name = 'memory+log'
+
+    def __init__(self, directory, fsync_interval=0.05, snapshot_every=5000):
+        super().__init__()
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.log_path = os.path.join(directory, LOG_FILE)
+        self.snapshot_every = snapshot_every
+        # seq 부여 + 로그 추가 순서
+        self._lock = threading.Lock()
+        # source 별 변경 순서 (메모리 반영 순서 = 로그 순서), _order_guard 는 락 생성/전체 잠금용
+        self._order_locks = {}
+        self._order_guard = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._seq = 0
+        self._owner_pid = os.getpid()
+
+        started = time.perf_counter()
+        replayed = self._restore()
+        self._snapshot_seq = self._seq - replayed
+        print(f"💾 상태 복원: 로그 {replayed}건 재생 ({(time.perf_counter() - started) * 1000:.1f}ms)")
+
+        self._log = MutationLog(self.log_path, fsync_interval)
+        atexit.register(self.close)
+        # 재생한 로그는 바로 스냅샷으로 압축 (잘린 마지막 줄 뒤에 이어 쓰지 않도록)
+        if replayed or os.path.getsize(self.log_path):
+            self.checkpoint()
+
+    # ---------- 변경 연산 ----------
+    @contextmanager
+    def _ordered(self, key):
+        """key(source) 단위 변경 순서 보장, key 가 None 이면 모든 source 를 잠금"""
+        if key is None:
+            with self._all_ordered():
+                yield
+            return
+        with self._order_guard:
+            lock = self._order_locks.get(key)
+            if lock is None:
+                lock = self._order_locks[key] = threading.Lock()
+        with lock:
+            yield
+
+    @contextmanager
+    def _all_ordered(self):
+        # guard 를 잡고 있는 동안 새 source 락은 생기지 않음
+        with self._order_guard:
+            locks = [self._order_locks[k] for k in sorted(self._order_locks)]
+            for lock in locks:
+                lock.acquire()
+            try:
+                yield
+            finally:
+                for lock in reversed(locks):
+                    lock.release()
+
+    def _mutate(self, key, op, *args):
+        with self._ordered(key):
+            if self._owner_pid != os.getpid():
+                self._owner_pid = os.getpid()
+            result = self._apply(op, args)
+            if op == 'delete_schedule' and not result:
+                return result
+            line = {'op': op, 'args': args}
+            with self._lock:
+                self._seq += 1
+                seq = line['seq'] = self._seq
+                self._log.append(json.dumps(line, ensure_ascii=False))
+        if seq % self.snapshot_every == 0:
+            threading.Thread(target=self.checkpoint, daemon=True).start()
+        return result
+
+    def _apply(self, op, args):
+        if op == 'log':
+            source, message, ts = args
+            return self.devices.get(source, create=True).log(message, ts)
+        return getattr(super(), op)(*args)
+
+    def update_distance(self, source, state):
+        return self._mutate(source, 'update_distance', source, state)
+
+    def add_schedule(self, source, item):
+        return self._mutate(source, 'add_schedule', source, item)
+
+    def replace_schedules(self, source, items):
+        return self._mutate(source, 'replace_schedules', source, list(items))
+
+    def delete_schedule(self, title=None, source=None, schedule_id=None):
+        # source 가 없으면 모든 장치에서 삭제하므로 전체 잠금
+        return self._mutate(source, 'delete_schedule', title, source, schedule_id)
+
+    def log(self, source, message):
+        return self._mutate(source, 'log', source, message, time.time())
+
+    def log_api(self, entry):
+        return self._mutate('\0api', 'log_api', entry)
+
+    # ---------- 스냅샷 ----------
+    def _dump(self):
+        devices = {}
+        for device in self.devices.all():
+            with device.lock:
+                devices[device.source] = {
+                    'distance': device.distance,
+                    'schedules': device.schedules.items(),
+                    'logs': list(device.logs)
+                }
+        return {'seq': self._seq, 'devices': devices, 'api_log': list(self._api_log)}
+
+    def checkpoint(self, blocking=False):
+        """
+        압축 스냅샷 저장 (동시에 하나만 실행)
+        - StateBackend.snapshot(source) 는 /api/state 조회용이라 이름을 따로 씀
+        """
+        if os.getpid() != self._owner_pid:
+            return False
+        if not self._snapshot_lock.acquire(blocking=blocking):
+            return False
+        try:
+            with self._all_ordered(), self._lock:
+                state = self._dump()
+                self._snapshot_seq = state['seq']
+                self._log.rotate(f"{self.log_path}.{state['seq']}")
+
+            tmp_path = self.snapshot_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            # 스냅샷에 포함된 로그는 제거 (재생 시 seq 로도 걸러짐)
+            for seq, path in self._rotated_logs():
+                if seq <= state['seq']:
+                    os.remove(path)
+            return True
+        finally:
+            self._snapshot_lock.release()
+
+    def _rotated_logs(self):
+        """(seq, 경로) 목록, seq 오름차순"""
+        rotated = []
+        for path in glob.glob(self.log_path + '.*'):
+            suffix = path.rsplit('.', 1)[1]
+            if suffix.isdigit():
+                rotated.append((int(suffix), path))
+        return sorted(rotated)
+
+    # ---------- 복원 ----------
+    def _restore(self):
+        snapshot_seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding='utf-8') as f:
+                state = json.load(f)
+            snapshot_seq = state['seq']
+            for source, data in state['devices'].items():
+                device = self.devices.get(source, create=True)
+                device.distance = data['distance']
+                device.schedules = ScheduleIndex(data['schedules'])
+                for ts, message in data['logs']:
+                    device.log(message, ts)
+            self._api_log.extend(state['api_log'])
+        self._seq = snapshot_seq
+
+        # 스냅샷 도중 종료된 경우 교체된 로그(mutations.log.N)가 남아 있을 수 있음
+        paths = [path for _, path in self._rotated_logs()] + [self.log_path]
+        replayed = 0
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 마지막 줄이 기록 도중 잘린 경우
+                        break
+                    if entry['seq'] <= self._seq:
+                        continue
+                    self._apply(entry['op'], entry['args'])
+                    self._seq = entry['seq']
+                    replayed += 1
+        return replayed
+
+    def close(self):
+        """종료 시 남은 로그 fsync 후 스냅샷"""
+        if os.getpid() != self._owner_pid or self._log.file.closed:
+            return
+        if self._seq != self._snapshot_seq:
+            self.checkpoint(blocking=True)
+        self._log.close()
@@ -0,0 +1,104 @@
+import bisect
+
+
+def schedule_key(item):
+    """
+    일정 식별자
+    - app_server 의 appointments.id 가 있으면 그대로 사용
+    - 없으면 (이름, 시간) 으로 대신 식별 (같은 일정 중복 추가 방지)
+    """
+    if item.get('id') is not None:
+        return str(item['id'])
+    return f"{schedule_title(item) or ''}@{schedule_start(item)}"
+
+
+def schedule_title(item):
+    return item.get('이름') or item.get('title')
+
+
+def schedule_start(item):
+    return str(item.get('시간') or item.get('time') or '')
+
+
+class ScheduleIndex:
+    """
+    id -> 일정 dict 색인 + 시작 시간 정렬 목록
+    - upsert/remove: dict 조회 O(1), 정렬 목록 위치 탐색 O(log n)
+    - 제목 색인으로 기존 title 기반 삭제도 전체 순회 없이 처리
+    """
+
+    def __init__(self, items=()):
+        self._items = {}
+        self._order = []
+        self._titles = {}
+        for item in items:
+            self.upsert(item)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return str(key) in self._items
+
+    def get(self, key):
+        return self._items.get(str(key))
+
+    def upsert(self, item):
+        """'added' / 'updated' / 변경 없으면 None"""
+        key = schedule_key(item)
+        old = self._items.get(key)
+        if old is not None:
+            if old == item:
+                return None
+            self._unlink(key, old)
+
+        self._items[key] = item
+        bisect.insort(self._order, (schedule_start(item), key))
+        self._titles.setdefault(schedule_title(item), set()).add(key)
+        return 'updated' if old is not None else 'added'
+
+    def remove(self, key):
+        key = str(key)
+        item = self._items.pop(key, None)
+        if item is None:
+            return False
+        self._unlink(key, item)
+        return True
+
+    def remove_title(self, title):
+        """제목이 같은 일정 모두 삭제, 삭제 개수 반환"""
+        keys = list(self._titles.get(title, ()))
+        for key in keys:
+            self.remove(key)
+        return len(keys)
+
+    def _unlink(self, key, item):
+        entry = (schedule_start(item), key)
+        i = bisect.bisect_left(self._order, entry)
+        if i < len(self._order) and self._order[i] == entry:
+            del self._order[i]
+
+        title = schedule_title(item)
+        keys = self._titles.get(title)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._titles[title]
+
+    def apply_view(self, items):
+        """조회 결과를 전체 교체 대신 차이만 반영, 변경 개수 반환"""
+        incoming = {schedule_key(item): item for item in items}
+        changes = {'added': 0, 'updated': 0, 'removed': 0}
+
+        for key in [k for k in self._items if k not in incoming]:
+            self.remove(key)
+            changes['removed'] += 1
+        for item in incoming.values():
+            result = self.upsert(item)
+            if result:
+                changes[result] += 1
+        return changes
+
+    def items(self):
+        """시작 시간 순 일정 목록"""
+        return [self._items[key] for _, key in self._order]
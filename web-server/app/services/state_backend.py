@@ -0,0 +1,661 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+from app.services.memory_store import DeviceRegistry, SERVER_LOG_LIMIT, API_LOG_LIMIT
+from app.services.schedule_index import schedule_key, schedule_start, schedule_title
+from app.services.timeseries import DistanceHistory, METRICS, TIERS, aggregate, clamp_step
+
+
+def _sample_values(state):
+    """거리 상태에서 (current, initial, diff) 추출, 숫자가 아니면 None"""
+    try:
+        return (
+            float(state.get('current_distance')),
+            float(state.get('initial_distance')),
+            float(state.get('distance_difference')),
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+def _merge_schedules(items):
+    """
+    여러 장치의 일정 사본을 schedule_key 기준으로 하나씩만 남기고 시작 시간순 정렬
+    (같은 id = 앱서버 appointments 의 같은 일정)
+    """
+    merged = {}
+    for item in items:
+        merged.setdefault(schedule_key(item), item)
+    return [merged[k] for k in sorted(merged, key=lambda k: (schedule_start(merged[k]), k))]
+
+
+class StateBackend(ABC):
+    """
+    웹서버 상태 저장소 인터페이스
+    - 라우트는 이 인터페이스만 사용
+    - 구현이 빠진 메서드가 있으면 요청 처리 중이 아니라 생성 시점에 TypeError
+    - 멀티 워커 배포에서는 프로세스 간 공유되는 구현(sqlite/redis)을 사용
+
+    일정 모델: 일정의 원본은 앱서버의 appointments 테이블 하나(장치 구분 없음)
+    - 장치별로 보관하는 것은 그 장치가 추가/조회해서 받은 사본
+    - source 없는 조회(전체 대시보드)는 사본을 schedule_key 로 합쳐 일정마다 한 번만 반환
+    - 삭제는 사본을 가진 모든 장치에서 제거하고, 제거된 장치 목록을 반환
+    """
+
+    name = 'base'
+    # 여러 워커 프로세스가 같은 상태를 볼 수 있는지
+    shared = False
+
+    @abstractmethod
+    def update_distance(self, source, state):
+        raise NotImplementedError
+
+    @abstractmethod
+    def latest_distance(self, source=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def distance_history(self, source, frm, to, step):
+        raise NotImplementedError
+
+    @abstractmethod
+    def history_sources(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_schedule(self, source, item):
+        """id(없으면 이름+시간) 기준 upsert"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def replace_schedules(self, source, items):
+        """조회 결과를 차이만 반영, {'added', 'updated', 'removed'} 반환"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_schedule(self, title=None, source=None, schedule_id=None):
+        """schedule_id 또는 제목으로 삭제, 일정이 제거된 source 목록 반환 (없으면 빈 목록)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def schedules(self, source=None):
+        """source 의 일정 사본, source 가 없으면 전체 장치를 합친 목록 (일정마다 하나)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def log(self, source, message):
+        raise NotImplementedError
+
+    @abstractmethod
+    def logs(self, source=None, limit=SERVER_LOG_LIMIT):
+        raise NotImplementedError
+
+    @abstractmethod
+    def log_api(self, entry):
+        raise NotImplementedError
+
+    @abstractmethod
+    def api_log(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def sources(self):
+        raise NotImplementedError
+
+    def snapshot(self, source=None):
+        """/api/state 응답 본문"""
+        state = {
+            'distance': self.latest_distance(source),
+            'schedule': self.schedules(source),
+            'api_log': self.api_log(),
+            'logs': self.logs(source)
+        }
+        if source:
+            state['source'] = source
+        else:
+            state['devices'] = self.sources()
+        return state
+
+
+class MemoryBackend(StateBackend):
+    """프로세스 메모리 저장소 (단일 워커 전용)"""
+
+    name = 'memory'
+
+    def __init__(self):
+        self.devices = DeviceRegistry()
+        self.history = DistanceHistory()
+        self._api_log = deque(maxlen=API_LOG_LIMIT)
+
+    def update_distance(self, source, state):
+        device = self.devices.get(source, create=True)
+        # dict 를 통째로 교체해서 읽는 쪽은 락 없이도 일관된 값을 봄
+        with device.lock:
+            device.distance = state
+        values = _sample_values(state)
+        if values is not None:
+            self.history.record(source, *values, ts=state['timestamp'])
+
+    def latest_distance(self, source=None):
+        if source:
+            device = self.devices.get(source)
+            return device.distance if device else {}
+        return self.devices.latest_distance()
+
+    def distance_history(self, source, frm, to, step):
+        return self.history.query(source, frm, to, step)
+
+    def history_sources(self):
+        return self.history.sources()
+
+    def add_schedule(self, source, item):
+        device = self.devices.get(source, create=True)
+        with device.lock:
+            device.schedules.upsert(item)
+
+    def replace_schedules(self, source, items):
+        device = self.devices.get(source, create=True)
+        with device.lock:
+            return device.schedules.apply_view(items)
+
+    def delete_schedule(self, title=None, source=None, schedule_id=None):
+        targets = [self.devices.get(source)] if source else self.devices.all()
+        removed = []
+        for device in targets:
+            if device is None:
+                continue
+            with device.lock:
+                if schedule_id is not None:
+                    count = device.schedules.remove(schedule_id)
+                else:
+                    count = device.schedules.remove_title(title)
+            if count:
+                removed.append(device.source)
+        return removed
+
+    def schedules(self, source=None):
+        if source:
+            device = self.devices.get(source)
+            return device.snapshot()['schedule'] if device else []
+        result = []
+        for device in self.devices.all():
+            result.extend(device.snapshot()['schedule'])
+        return _merge_schedules(result)
+
+    def log(self, source, message):
+        self.devices.get(source, create=True).log(message)
+
+    def logs(self, source=None, limit=SERVER_LOG_LIMIT):
+        if source:
+            device = self.devices.get(source)
+            return [message for _, message in device.log_entries()][-limit:] if device else []
+        return self.devices.merged_logs(limit)
+
+    def log_api(self, entry):
+        self._api_log.append(entry)
+
+    def api_log(self):
+        return list(self._api_log)
+
+    def sources(self):
+        return self.devices.sources()
+
+
+class SQLiteBackend(StateBackend):
+    """
+    SQLite(WAL) 저장소 - 같은 호스트의 여러 워커 프로세스가 공유
+    - 연결은 (프로세스, 스레드) 별로 생성
+    - 거리 이력은 원본 + 해상도별 롤업 테이블 (UPSERT 로 누적)
+    """
+
+    name = 'sqlite'
+    shared = True
+
+    # 원본 샘플 보관 시간 (초)
+    RAW_RETENTION = 600
+    # 오래된 행 정리 주기 (쓰기 횟수)
+    TRIM_EVERY = 200
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self._init_schema()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self):
+        rollup_cols = ', '.join(f'{m}_min REAL, {m}_max REAL, {m}_sum REAL' for m in METRICS)
+        self._conn().executescript(f'''
+            CREATE TABLE IF NOT EXISTS devices (source TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS distance (
+                source TEXT PRIMARY KEY, ts REAL NOT NULL, state TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS schedules (
+                source TEXT NOT NULL, id TEXT NOT NULL, start_time TEXT NOT NULL,
+                title TEXT, data TEXT NOT NULL,
+                PRIMARY KEY (source, id)
+            );
+            CREATE INDEX IF NOT EXISTS schedules_start ON schedules(source, start_time);
+            CREATE INDEX IF NOT EXISTS schedules_title ON schedules(title);
+            CREATE TABLE IF NOT EXISTS server_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT, source TEXT NOT NULL,
+                ts REAL NOT NULL, message TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS server_log_source ON server_log(source, seq);
+            CREATE TABLE IF NOT EXISTS api_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS distance_raw (
+                source TEXT NOT NULL, ts REAL NOT NULL,
+                current REAL, initial REAL, diff REAL
+            );
+            CREATE INDEX IF NOT EXISTS distance_raw_source ON distance_raw(source, ts);
+            CREATE TABLE IF NOT EXISTS distance_rollup (
+                source TEXT NOT NULL, resolution INTEGER NOT NULL, bucket REAL NOT NULL,
+                count INTEGER NOT NULL, {rollup_cols},
+                PRIMARY KEY (source, resolution, bucket)
+            );
+        ''')
+
+    def _write(self, statements):
+        """여러 문장을 한 트랜잭션으로 실행, 변경된 행 수 반환"""
+        conn = self._conn()
+        changed = 0
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for sql, params in statements:
+                changed += max(conn.execute(sql, params).rowcount, 0)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._writes += 1
+        if self._writes % self.TRIM_EVERY == 0:
+            self._trim()
+        return changed
+
+    def _trim(self):
+        now = time.time()
+        statements = [
+            ('DELETE FROM distance_raw WHERE ts < ?', (now - self.RAW_RETENTION,)),
+            ('DELETE FROM server_log WHERE seq NOT IN '
+             '(SELECT seq FROM server_log AS l WHERE l.source = server_log.source '
+             'ORDER BY seq DESC LIMIT ?)', (SERVER_LOG_LIMIT,)),
+            ('DELETE FROM api_log WHERE seq <= (SELECT MAX(seq) FROM api_log) - ?', (API_LOG_LIMIT,)),
+        ]
+        for resolution, capacity in TIERS:
+            if resolution:
+                statements.append((
+                    'DELETE FROM distance_rollup WHERE resolution = ? AND bucket < ?',
+                    (resolution, now - resolution * capacity)
+                ))
+        conn = self._conn()
+        for sql, params in statements:
+            conn.execute(sql, params)
+
+    def _device(self, source):
+        return ('INSERT OR IGNORE INTO devices (source) VALUES (?)', (source,))
+
+    def update_distance(self, source, state):
+        ts = state['timestamp']
+        statements = [
+            self._device(source),
+            ('INSERT OR REPLACE INTO distance (source, ts, state) VALUES (?, ?, ?)',
+             (source, ts, json.dumps(state)))
+        ]
+        values = _sample_values(state)
+        if values is not None:
+            statements.append((
+                'INSERT INTO distance_raw (source, ts, current, initial, diff) VALUES (?, ?, ?, ?, ?)',
+                (source, ts) + values
+            ))
+            cols = ', '.join(f'{m}_min, {m}_max, {m}_sum' for m in METRICS)
+            updates = ', '.join(
+                f'{m}_min = MIN({m}_min, excluded.{m}_min), '
+                f'{m}_max = MAX({m}_max, excluded.{m}_max), '
+                f'{m}_sum = {m}_sum + excluded.{m}_sum'
+                for m in METRICS
+            )
+            sql = (
+                f'INSERT INTO distance_rollup (source, resolution, bucket, count, {cols}) '
+                f'VALUES (?, ?, ?, 1, {", ".join("?" * 3 * len(METRICS))}) '
+                f'ON CONFLICT (source, resolution, bucket) DO UPDATE SET count = count + 1, {updates}'
+            )
+            for resolution, _ in TIERS:
+                if resolution:
+                    bucket = ts - (ts % resolution)
+                    params = [source, resolution, bucket]
+                    for v in values:
+                        params += [v, v, v]
+                    statements.append((sql, tuple(params)))
+        self._write(statements)
+
+    def latest_distance(self, source=None):
+        if source:
+            row = self._conn().execute('SELECT state FROM distance WHERE source = ?', (source,)).fetchone()
+        else:
+            row = self._conn().execute('SELECT state FROM distance ORDER BY ts DESC LIMIT 1').fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def distance_history(self, source, frm, to, step):
+        conn = self._conn()
+        if not conn.execute('SELECT 1 FROM distance WHERE source = ?', (source,)).fetchone():
+            return None
+        if to <= frm:
+            return []
+        step = clamp_step(frm, to, step)
+        # step 이하 해상도 중 가장 거친 단계 (DistanceSeries._pick_tier 와 동일)
+        resolution = max(r for r, _ in TIERS if r <= step)
+
+        if resolution == 0:
+            rows = conn.execute(
+                'SELECT ts, current, initial, diff FROM distance_raw '
+                'WHERE source = ? AND ts >= ? AND ts < ? ORDER BY ts',
+                (source, frm, to)
+            )
+            samples = ((r[0], 1, {m: (v, v, v) for m, v in zip(METRICS, r[1:])}) for r in rows)
+        else:
+            cols = ', '.join(f'{m}_min, {m}_max, {m}_sum' for m in METRICS)
+            rows = conn.execute(
+                f'SELECT bucket, count, {cols} FROM distance_rollup '
+                'WHERE source = ? AND resolution = ? AND bucket >= ? AND bucket < ? ORDER BY bucket',
+                (source, resolution, frm, to)
+            )
+            samples = (
+                (r[0], r[1], {m: tuple(r[2 + i * 3:5 + i * 3]) for i, m in enumerate(METRICS)})
+                for r in rows
+            )
+        return aggregate(samples, frm, step)
+
+    def history_sources(self):
+        return [r[0] for r in self._conn().execute('SELECT source FROM distance')]
+
+    _UPSERT_SCHEDULE = (
+        'INSERT INTO schedules (source, id, start_time, title, data) VALUES (?, ?, ?, ?, ?) '
+        'ON CONFLICT (source, id) DO UPDATE SET '
+        'start_time = excluded.start_time, title = excluded.title, data = excluded.data'
+    )
+
+    def _upsert_schedule(self, source, item):
+        return (self._UPSERT_SCHEDULE, (
+            source, schedule_key(item), schedule_start(item), schedule_title(item),
+            json.dumps(item, sort_keys=True)
+        ))
+
+    def add_schedule(self, source, item):
+        self._write([self._device(source), self._upsert_schedule(source, item)])
+
+    def replace_schedules(self, source, items):
+        incoming = {schedule_key(item): item for item in items}
+        existing = dict(self._conn().execute(
+            'SELECT id, data FROM schedules WHERE source = ?', (source,)).fetchall())
+
+        changes = {'added': 0, 'updated': 0, 'removed': 0}
+        statements = [self._device(source)]
+        for key in existing.keys() - incoming.keys():
+            statements.append(('DELETE FROM schedules WHERE source = ? AND id = ?', (source, key)))
+            changes['removed'] += 1
+        for key, item in incoming.items():
+            if key not in existing:
+                changes['added'] += 1
+            elif existing[key] != json.dumps(item, sort_keys=True):
+                changes['updated'] += 1
+            else:
+                continue
+            statements.append(self._upsert_schedule(source, item))
+        self._write(statements)
+        return changes
+
+    def delete_schedule(self, title=None, source=None, schedule_id=None):
+        if schedule_id is not None:
+            sql, params = 'DELETE FROM schedules WHERE id = ?', [str(schedule_id)]
+        else:
+            sql, params = 'DELETE FROM schedules WHERE title = ?', [title]
+        if source:
+            sql += ' AND source = ?'
+            params.append(source)
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(sql + ' RETURNING source', tuple(params)).fetchall()
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return sorted({r[0] for r in rows})
+
+    def schedules(self, source=None):
+        if source:
+            rows = self._conn().execute(
+                'SELECT data FROM schedules WHERE source = ? ORDER BY start_time, id', (source,))
+        else:
+            rows = self._conn().execute('SELECT data FROM schedules ORDER BY source, start_time, id')
+            return _merge_schedules(json.loads(r[0]) for r in rows)
+        return [json.loads(r[0]) for r in rows]
+
+    def log(self, source, message):
+        self._write([
+            self._device(source),
+            ('INSERT INTO server_log (source, ts, message) VALUES (?, ?, ?)', (source, time.time(), message))
+        ])
+
+    def logs(self, source=None, limit=SERVER_LOG_LIMIT):
+        if source:
+            rows = self._conn().execute(
+                'SELECT message FROM server_log WHERE source = ? ORDER BY seq DESC LIMIT ?', (source, limit))
+        else:
+            rows = self._conn().execute('SELECT message FROM server_log ORDER BY seq DESC LIMIT ?', (limit,))
+        return [r[0] for r in rows][::-1]
+
+    def log_api(self, entry):
+        self._write([('INSERT INTO api_log (data) VALUES (?)', (json.dumps(entry),))])
+
+    def api_log(self):
+        rows = self._conn().execute('SELECT data FROM api_log ORDER BY seq DESC LIMIT ?', (API_LOG_LIMIT,))
+        return [json.loads(r[0]) for r in rows][::-1]
+
+    def sources(self):
+        return [r[0] for r in self._conn().execute('SELECT source FROM devices')]
+
+
+class RedisBackend(StateBackend):
+    """
+    Redis 호환 서버 저장소 (redis, KeyDB, Valkey 등)
+    - 거리 이력은 source 별 sorted set 에 원본만 보관 (최근 RAW_LIMIT 개)
+    """
+
+    name = 'redis'
+    shared = True
+
+    RAW_LIMIT = 4096
+
+    def __init__(self, url, prefix='ws:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("redis 패키지가 필요합니다. pip install redis 로 설치하세요.")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+
+    def _key(self, *parts):
+        return self.prefix + ':'.join(parts)
+
+    def update_distance(self, source, state):
+        pipe = self.client.pipeline()
+        pipe.sadd(self._key('sources'), source)
+        pipe.set(self._key('distance', source), json.dumps(state))
+        pipe.zadd(self._key('distance_latest'), {source: state['timestamp']})
+        values = _sample_values(state)
+        if values is not None:
+            member = json.dumps([state['timestamp']] + list(values))
+            history = self._key('history', source)
+            pipe.zadd(history, {member: state['timestamp']})
+            pipe.zremrangebyrank(history, 0, -self.RAW_LIMIT - 1)
+        pipe.execute()
+
+    def latest_distance(self, source=None):
+        if not source:
+            latest = self.client.zrevrange(self._key('distance_latest'), 0, 0)
+            if not latest:
+                return {}
+            source = latest[0]
+        data = self.client.get(self._key('distance', source))
+        return json.loads(data) if data else {}
+
+    def distance_history(self, source, frm, to, step):
+        if not self.client.exists(self._key('distance', source)):
+            return None
+        if to <= frm:
+            return []
+        step = clamp_step(frm, to, step)
+        members = self.client.zrangebyscore(self._key('history', source), frm, f'({to}')
+        samples = []
+        for member in members:
+            ts, *values = json.loads(member)
+            samples.append((ts, 1, {m: (v, v, v) for m, v in zip(METRICS, values)}))
+        return aggregate(samples, frm, step)
+
+    def history_sources(self):
+        return self.client.zrange(self._key('distance_latest'), 0, -1)
+
+    def add_schedule(self, source, item):
+        pipe = self.client.pipeline()
+        pipe.sadd(self._key('sources'), source)
+        pipe.hset(self._key('schedules', source), schedule_key(item), json.dumps(item, sort_keys=True))
+        pipe.execute()
+
+    def replace_schedules(self, source, items):
+        key = self._key('schedules', source)
+        incoming = {schedule_key(item): json.dumps(item, sort_keys=True) for item in items}
+        existing = self.client.hgetall(key)
+
+        changes = {'added': 0, 'updated': 0, 'removed': 0}
+        pipe = self.client.pipeline()
+        pipe.sadd(self._key('sources'), source)
+        removed = [k for k in existing if k not in incoming]
+        if removed:
+            pipe.hdel(key, *removed)
+            changes['removed'] = len(removed)
+        for item_key, data in incoming.items():
+            if item_key not in existing:
+                changes['added'] += 1
+            elif existing[item_key] != data:
+                changes['updated'] += 1
+            else:
+                continue
+            pipe.hset(key, item_key, data)
+        pipe.execute()
+        return changes
+
+    def delete_schedule(self, title=None, source=None, schedule_id=None):
+        removed = []
+        for src in ([source] if source else self.sources()):
+            key = self._key('schedules', src)
+            if schedule_id is not None:
+                count = self.client.hdel(key, str(schedule_id))
+            else:
+                matches = [k for k, data in self.client.hgetall(key).items()
+                           if schedule_title(json.loads(data)) == title]
+                count = self.client.hdel(key, *matches) if matches else 0
+            if count:
+                removed.append(src)
+        return removed
+
+    def schedules(self, source=None):
+        result = []
+        for src in ([source] if source else self.sources()):
+            items = self.client.hgetall(self._key('schedules', src))
+            entries = [(k, json.loads(d)) for k, d in items.items()]
+            entries.sort(key=lambda e: (schedule_start(e[1]), e[0]))
+            result.extend(item for _, item in entries)
+        return result if source else _merge_schedules(result)
+
+    def log(self, source, message):
+        entry = json.dumps([time.time(), source, message])
+        pipe = self.client.pipeline()
+        pipe.sadd(self._key('sources'), source)
+        for key in (self._key('logs', source), self._key('logs')):
+            pipe.rpush(key, entry)
+            pipe.ltrim(key, -SERVER_LOG_LIMIT, -1)
+        pipe.execute()
+
+    def logs(self, source=None, limit=SERVER_LOG_LIMIT):
+        key = self._key('logs', source) if source else self._key('logs')
+        return [json.loads(e)[2] for e in self.client.lrange(key, -limit, -1)]
+
+    def log_api(self, entry):
+        pipe = self.client.pipeline()
+        pipe.rpush(self._key('api_log'), json.dumps(entry))
+        pipe.ltrim(self._key('api_log'), -API_LOG_LIMIT, -1)
+        pipe.execute()
+
+    def api_log(self):
+        return [json.loads(e) for e in self.client.lrange(self._key('api_log'), 0, -1)]
+
+    def sources(self):
+        return sorted(self.client.smembers(self._key('sources')))
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def backend_class(name=None):
+    """STATE_BACKEND 환경변수(memory/sqlite/redis)에 해당하는 저장소 클래스 (생성하지 않음)"""
+    name = (name or os.getenv('STATE_BACKEND', 'memory')).lower()
+    if name == 'memory':
+        # STATE_PERSIST_DIR 가 있으면 스냅샷 + 변경 로그로 재시작 후에도 상태 유지
+        if os.getenv('STATE_PERSIST_DIR'):
+            from app.services.persistence import PersistentMemoryBackend
+            return PersistentMemoryBackend
+        return MemoryBackend
+    if name == 'sqlite':
+        return SQLiteBackend
+    if name == 'redis':
+        return RedisBackend
+    raise ValueError(f"알 수 없는 STATE_BACKEND: {name}")
+
+
+def create_backend(name=None):
+    """STATE_BACKEND 환경변수에 따라 저장소 생성"""
+    cls = backend_class(name)
+    if cls is MemoryBackend:
+        return MemoryBackend()
+    if cls is SQLiteBackend:
+        return SQLiteBackend(os.getenv('STATE_SQLITE_PATH', 'web_state.db'))
+    if cls is RedisBackend:
+        return RedisBackend(os.getenv('STATE_REDIS_URL', 'redis://localhost:6379/0'))
+    return cls(
+        os.getenv('STATE_PERSIST_DIR'),
+        fsync_interval=float(os.getenv('STATE_FSYNC_INTERVAL', 0.05)),
+        snapshot_every=int(os.getenv('STATE_SNAPSHOT_EVERY', 5000))
+    )
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
@@ -0,0 +1,249 @@
+import threading
+import time
+from array import array
+
+# 저장하는 측정값 (timestamp 제외)
+METRICS = ('current', 'initial', 'diff')
+
+# (해상도 초, 보관 개수) - 0 은 원본 샘플
+TIERS = ((0, 4096), (1, 3600), (60, 1440))
+
+# 한 번의 조회로 돌려주는 최대 구간 수
+MAX_WINDOWS = 500
+
+
+class _Ring:
+    """array 기반 고정 크기 링 버퍼 (컬럼별 float64 배열)"""
+
+    def __init__(self, capacity, columns):
+        self.capacity = capacity
+        self.columns = {c: array('d', [0.0]) * capacity for c in columns}
+        self.start = 0
+        self.size = 0
+
+    def append(self, values):
+        if self.size < self.capacity:
+            pos = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            pos = self.start
+            self.start = (self.start + 1) % self.capacity
+        for c, col in self.columns.items():
+            col[pos] = values[c]
+
+    def get(self, column, i):
+        return self.columns[column][(self.start + i) % self.capacity]
+
+    def bisect(self, ts):
+        """ts 이상인 첫 번째 논리 인덱스 (ts 컬럼은 오름차순)"""
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.get('ts', mid) < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def oldest(self):
+        return self.get('ts', 0) if self.size else None
+
+
+def _agg_columns():
+    cols = ['ts', 'count']
+    for m in METRICS:
+        cols += [f'{m}_min', f'{m}_max', f'{m}_sum']
+    return cols
+
+
+class _Bucket:
+    """집계 중인 (아직 flush 되지 않은) 구간"""
+
+    def __init__(self, ts):
+        self.ts = ts
+        self.count = 0
+        self.values = {}
+
+    def add(self, sample, count=1):
+        for m in METRICS:
+            lo, hi, total = sample[m]
+            if self.count == 0:
+                self.values[m] = [lo, hi, total]
+            else:
+                cur = self.values[m]
+                cur[0] = min(cur[0], lo)
+                cur[1] = max(cur[1], hi)
+                cur[2] += total
+        self.count += count
+
+    def as_row(self):
+        row = {'ts': self.ts, 'count': float(self.count)}
+        for m in METRICS:
+            row[f'{m}_min'], row[f'{m}_max'], row[f'{m}_sum'] = self.values[m]
+        return row
+
+
+class _Tier:
+    """해상도별 min/max/sum 집계 링 버퍼"""
+
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.ring = _Ring(capacity, _agg_columns())
+        self.pending = None
+
+    def add(self, ts, sample):
+        bucket_ts = ts - (ts % self.resolution)
+        if self.pending is not None and self.pending.ts != bucket_ts:
+            self.ring.append(self.pending.as_row())
+            self.pending = None
+        if self.pending is None:
+            self.pending = _Bucket(bucket_ts)
+        self.pending.add(sample)
+
+    def rows(self, frm, to):
+        """[frm, to) 구간 집계 행을 (ts, count, {metric: (min, max, sum)}) 로 순회"""
+        ring = self.ring
+        for i in range(ring.bisect(frm), ring.size):
+            ts = ring.get('ts', i)
+            if ts >= to:
+                return
+            yield ts, int(ring.get('count', i)), {
+                m: (ring.get(f'{m}_min', i), ring.get(f'{m}_max', i), ring.get(f'{m}_sum', i))
+                for m in METRICS
+            }
+        p = self.pending
+        if p is not None and frm <= p.ts < to:
+            yield p.ts, p.count, {m: tuple(v) for m, v in p.values.items()}
+
+    def oldest(self):
+        if self.ring.size:
+            return self.ring.oldest()
+        return self.pending.ts if self.pending else None
+
+
+class _RawTier:
+    """원본 샘플 링 버퍼"""
+
+    resolution = 0
+
+    def __init__(self, capacity):
+        self.ring = _Ring(capacity, ('ts',) + METRICS)
+
+    def add(self, ts, values):
+        row = dict(values)
+        row['ts'] = ts
+        self.ring.append(row)
+
+    def rows(self, frm, to):
+        ring = self.ring
+        for i in range(ring.bisect(frm), ring.size):
+            ts = ring.get('ts', i)
+            if ts >= to:
+                return
+            yield ts, 1, {m: (v, v, v) for m in METRICS for v in (ring.get(m, i),)}
+
+    def oldest(self):
+        return self.ring.oldest()
+
+
+def clamp_step(frm, to, step):
+    """구간 수가 MAX_WINDOWS 를 넘지 않도록 step 조정"""
+    return max(step, (to - frm) / MAX_WINDOWS)
+
+
+def aggregate(rows, frm, step):
+    """(ts, count, {metric: (min, max, sum)}) 행을 step 구간별 min/max/avg 로 묶음"""
+    windows = {}
+    for ts, count, values in rows:
+        key = int((ts - frm) // step)
+        bucket = windows.get(key)
+        if bucket is None:
+            bucket = windows[key] = _Bucket(frm + key * step)
+        bucket.add(values, count)
+
+    result = []
+    for key in sorted(windows):
+        bucket = windows[key]
+        entry = {'from': bucket.ts, 'to': bucket.ts + step, 'count': bucket.count}
+        for m in METRICS:
+            lo, hi, total = bucket.values[m]
+            entry[m] = {'min': lo, 'max': hi, 'avg': total / bucket.count}
+        result.append(entry)
+    return result
+
+
+class DistanceSeries:
+    """
+    한 source 의 거리 시계열 (원본 + 다운샘플 단계)
+    - 링 버퍼는 ts 오름차순이어야 하므로(bisect) 늦게 도착한 샘플의 ts 는 마지막 ts 로 당김
+      (요청 스레드 간 순서 역전은 수 ms 수준이라 집계에는 영향 없음)
+    """
+
+    def __init__(self, tiers=TIERS):
+        self.lock = threading.Lock()
+        self.last_ts = float('-inf')
+        self.tiers = []
+        for resolution, capacity in tiers:
+            if resolution == 0:
+                self.tiers.append(_RawTier(capacity))
+            else:
+                self.tiers.append(_Tier(resolution, capacity))
+
+    def add(self, ts, current, initial, diff):
+        values = {'current': current, 'initial': initial, 'diff': diff}
+        sample = {m: (v, v, v) for m, v in values.items()}
+        with self.lock:
+            ts = max(ts, self.last_ts)
+            self.last_ts = ts
+            for tier in self.tiers:
+                if tier.resolution == 0:
+                    tier.add(ts, values)
+                else:
+                    tier.add(ts, sample)
+
+    def _pick_tier(self, step):
+        # step 이하 해상도 중 가장 거친 단계 (보관 기간이 가장 김)
+        candidates = [t for t in self.tiers if t.resolution <= step]
+        return candidates[-1] if candidates else self.tiers[0]
+
+    def query(self, frm, to, step):
+        """[frm, to) 를 step 초 구간으로 나눈 min/max/avg 목록"""
+        if to <= frm:
+            return []
+        step = clamp_step(frm, to, step)
+        with self.lock:
+            return aggregate(self._pick_tier(step).rows(frm, to), frm, step)
+
+
+class DistanceHistory:
+    """source 별 DistanceSeries 모음"""
+
+    def __init__(self, tiers=TIERS):
+        self._tiers = tiers
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def series(self, source, create=False):
+        series = self._series.get(source)
+        if series is None and create:
+            with self._lock:
+                series = self._series.setdefault(source, DistanceSeries(self._tiers))
+        return series
+
+    def sources(self):
+        return list(self._series.keys())
+
+    def record(self, source, current, initial, diff, ts=None):
+        try:
+            values = (float(current), float(initial), float(diff))
+        except (TypeError, ValueError):
+            return False
+        ts = time.time() if ts is None else ts
+        self.series(source, create=True).add(ts, *values)
+        return True
+
+    def query(self, source, frm, to, step):
+        series = self.series(source)
+        if series is None:
+            return None
+        return series.query(frm, to, step)
@@ -0,0 +1,155 @@
+import bisect
+import math
+import threading
+import time
+from collections import deque
+
+# 히스토그램 구간 상한 (ms), 마지막은 그 이상
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+class StageHistogram:
+    """구간 지연 히스토그램 + 백분위 계산용 최근 샘플"""
+
+    def __init__(self, samples=1000):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.recent = deque(maxlen=samples)
+
+    def add(self, ms):
+        # 서로 다른 호스트 시계 오차로 음수가 나올 수 있으므로 0 으로 보정
+        ms = max(ms, 0.0)
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.recent.append(ms)
+
+    def summary(self):
+        ordered = sorted(self.recent)
+
+        def pct(p):
+            if not ordered:
+                return None
+            return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+        labels = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            'count': self.count,
+            'avg_ms': self.total_ms / self.count if self.count else None,
+            'p50_ms': pct(50),
+            'p95_ms': pct(95),
+            'p99_ms': pct(99),
+            'histogram': dict(zip(labels, self.counts))
+        }
+
+
+class TraceStore:
+    """
+    요청 추적 기록 (발화/측정 -> 앱서버 -> 웹서버 -> 대시보드 조회)
+    - 웹서버에 저장된 추적은 대시보드가 /api/state 로 가져갈 때 완료 처리
+    - 구간 이름은 '종류:이전단계>다음단계', 전체 구간은 '종류:total'
+    - 호스트 간 구간은 각 호스트의 time.time() 차이이므로 시계 동기화(NTP)가 필요
+    - 프로세스별 기록 (멀티 워커에서는 워커마다 따로 집계)
+    """
+
+    def __init__(self, recent=200, pending=500):
+        self.lock = threading.Lock()
+        self.recent = deque(maxlen=recent)
+        self.pending = deque(maxlen=pending)
+        self.stages = {}
+
+    def hop(self, trace, stage):
+        trace['hops'].append({'stage': stage, 'ts': time.time()})
+
+    def record(self, trace, source):
+        """웹서버 반영이 끝난 추적을 대시보드 조회 대기열에 추가"""
+        trace['source'] = source
+        with self.lock:
+            self.pending.append(trace)
+
+    def mark_polled(self, source=None):
+        """대시보드가 상태를 가져감 - 해당 source 의 대기 중 추적 완료"""
+        now = time.time()
+        with self.lock:
+            if not self.pending:
+                return
+            remaining = deque(maxlen=self.pending.maxlen)
+            for trace in self.pending:
+                if source is None or trace['source'] == source:
+                    trace['hops'].append({'stage': 'dashboard_poll', 'ts': now})
+                    # 잘못된 추적 하나 때문에 나머지 대기열이 막히지 않도록 개별 처리 (실패 시 버림)
+                    try:
+                        self._finish(trace)
+                    except (TypeError, ValueError, KeyError):
+                        pass
+                else:
+                    remaining.append(trace)
+            self.pending = remaining
+
+    def _finish(self, trace):
+        kind = trace.get('kind') or 'unknown'
+        hops = trace['hops']
+        durations = {}
+        for prev, cur in zip(hops, hops[1:]):
+            durations[f"{prev['stage']}>{cur['stage']}"] = (cur['ts'] - prev['ts']) * 1000
+        if len(hops) > 1:
+            durations['total'] = (hops[-1]['ts'] - hops[0]['ts']) * 1000
+
+        for stage, ms in durations.items():
+            name = f"{kind}:{stage}"
+            histogram = self.stages.get(name)
+            if histogram is None:
+                histogram = self.stages[name] = StageHistogram()
+            histogram.add(ms)
+
+        trace['durations_ms'] = durations
+        self.recent.append(trace)
+
+    def summary(self, kind=None, limit=20):
+        with self.lock:
+            stages = {
+                name: histogram.summary()
+                for name, histogram in sorted(self.stages.items())
+                if kind is None or name.startswith(f"{kind}:")
+            }
+            recent = [t for t in self.recent if kind is None or t.get('kind') == kind]
+            return {
+                'stages': stages,
+                'recent': recent[-limit:][::-1] if limit else [],
+                'pending': len(self.pending)
+            }
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _valid_hops(hops):
+    return isinstance(hops, list) and all(
+        isinstance(hop, dict) and isinstance(hop.get('stage'), str) and _is_number(hop.get('ts'))
+        for hop in hops
+    )
+
+
+def trace_from_payload(data, kind):
+    """
+    요청 본문의 추적 정보 (없으면 Pi 의 timestamp 로 최소 추적 생성)
+    - 외부 입력이므로 모든 구간에 문자열 stage, 숫자 ts 가 있을 때만 사용 (아니면 추적 안 함)
+    """
+    trace = data.get('trace')
+    if isinstance(trace, dict):
+        if not _valid_hops(trace.get('hops')):
+            return None
+        trace.setdefault('kind', kind)
+        return trace
+    if _is_number(data.get('timestamp')):
+        return {
+            'id': data.get('trace_id'),
+            'kind': kind,
+            'hops': [{'stage': 'pi_send', 'ts': data['timestamp']}]
+        }
+    return None
+
+
+traces = TraceStore()
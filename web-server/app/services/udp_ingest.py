@@ -0,0 +1,87 @@
+import os
+import socket
+import threading
+
+from app.services.distance_udp import PACKET, SequenceFilter, decode
+from app.services.instrumentation import metrics
+
+
+class UdpDistanceListener:
+    """
+    거리 샘플 UDP 수신 스레드
+    - 패킷마다 handler(sample) 호출 (HTTP /api/distance 와 같은 저장 경로)
+    - 크기가 맞지 않거나 순서가 늦은 패킷은 버리고 카운터만 올림
+    """
+
+    def __init__(self, handler, host='0.0.0.0', port=3001):
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.filter = SequenceFilter()
+        self.sock = None
+        self.thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self.sock.bind((self.host, self.port))
+        except OSError:
+            self.sock.close()
+            self.sock = None
+            raise
+        self.port = self.sock.getsockname()[1]
+        self.sock.settimeout(0.5)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                data, _ = self.sock.recvfrom(PACKET.size + 1)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            try:
+                sample = decode(data)
+            except ValueError:
+                metrics.inc('udp_distance_packets', result='malformed')
+                continue
+            if not self.filter.accept(sample['source'], sample['seq']):
+                metrics.inc('udp_distance_packets', result='out_of_order')
+                continue
+
+            metrics.inc('udp_distance_packets', result='accepted')
+            try:
+                self.handler(sample)
+            except Exception as e:
+                metrics.inc('udp_distance_packets', result='error')
+                print(f"⚠️ UDP 거리 샘플 처리 오류: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+        if self.sock is not None:
+            self.sock.close()
+
+
+def start_udp_listener(handler):
+    """
+    DISTANCE_UDP_PORT 가 설정된 경우에만 수신 시작, 리스너 또는 None 반환
+    - 멀티 워커에서는 먼저 포트를 잡은 워커 하나만 수신 (상태는 공유 저장소로 전파)
+    """
+    port = os.getenv('DISTANCE_UDP_PORT')
+    if not port:
+        return None
+    host = os.getenv('DISTANCE_UDP_HOST', '0.0.0.0')
+    try:
+        listener = UdpDistanceListener(handler, host, int(port)).start()
+    except OSError as e:
+        print(f"ℹ️ UDP 거리 수신 포트 {port} 사용 불가 (다른 워커가 수신 중일 수 있음): {e}")
+        return None
+    print(f"📡 UDP 거리 수신: {host}:{listener.port}")
+    return listener
@@ -0,0 +1,91 @@
+"""
+메모리 저장소 영속화(스냅샷 + 변경 로그) 쓰기 오버헤드 측정
+
+    python bench_persistence.py [--ops 20000]
+
+라우트가 호출하는 것과 같은 저장소 연산(거리 수신, 일정 추가/삭제, 로그)을
+fsync 설정별로 반복 실행하고 요청당 평균/p99 시간을 비교한다.
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+from app.services.state_backend import MemoryBackend
+from app.services.persistence import PersistentMemoryBackend
+
+
+def distance_request(store, i):
+    # receive_distance: update_distance + log + log_api
+    store.update_distance('bench', {
+        'current_distance': 100.0 + i % 10,
+        'initial_distance': 100.0,
+        'distance_difference': float(i % 10),
+        'elapsed_time': 1.0,
+        'source': 'bench',
+        'timestamp': time.time()
+    })
+    store.log('bench', f"distance: {100.0 + i % 10:.2f}px")
+    store.log_api({'endpoint': '/api/distance', 'status': 200, 'timestamp': time.time()})
+
+
+def voice_request(store, i):
+    # receive_voice_result(add) + delete_schedule
+    store.add_schedule('bench', {'이름': f'회의{i}', '시간': '10:00', '목표시간': '11:00'})
+    store.log('bench', "schedule added")
+    store.delete_schedule(f'회의{i}', 'bench')
+    store.log_api({'endpoint': '/api/voice-result', 'status': 200, 'timestamp': time.time()})
+
+
+def measure(store, request, ops):
+    samples = []
+    for i in range(ops):
+        started = time.perf_counter()
+        request(store, i)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        'avg_us': sum(samples) / ops * 1e6,
+        'p99_us': samples[int(ops * 0.99) - 1] * 1e6
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ops', type=int, default=20000)
+    args = parser.parse_args()
+
+    configs = [
+        ('memory', None),
+        ('log, fsync 50ms 배치', 0.05),
+        ('log, 매 기록 fsync', 0),
+    ]
+    for request in (distance_request, voice_request):
+        print(f"\n▶ {request.__name__} ({args.ops}회)")
+        baseline = None
+        for label, fsync_interval in configs:
+            directory = None
+            if fsync_interval is None:
+                store = MemoryBackend()
+            else:
+                directory = tempfile.mkdtemp(prefix='ws-bench-')
+                store = PersistentMemoryBackend(directory, fsync_interval=fsync_interval)
+            ops = args.ops if fsync_interval != 0 else min(args.ops, 2000)
+            result = measure(store, request, ops)
+            if baseline is None:
+                baseline = result['avg_us']
+            print(f"  {label:<22} 평균 {result['avg_us']:8.1f}µs  p99 {result['p99_us']:8.1f}µs  "
+                  f"(+{result['avg_us'] - baseline:.1f}µs/요청)")
+
+            if directory:
+                started = time.perf_counter()
+                store.close()
+                restored = PersistentMemoryBackend(directory, fsync_interval=fsync_interval)
+                print(f"  {'':<22} 스냅샷+재시작 복원 {(time.perf_counter() - started) * 1000:.1f}ms, "
+                      f"로그 {len(restored.logs('bench'))}줄 복원")
+                restored.close()
+                shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
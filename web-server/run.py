@@ -1,6 +1,66 @@
+import os
 from app import create_app
+from app.services.state_backend import backend_class
+from app.services.udp_ingest import start_udp_listener
+from app.routes.distance import receive_distance_datagram
 
 app = create_app()
 
+
+def run_production(host, port, workers):
+    """gunicorn 멀티 워커 실행 (상태는 STATE_BACKEND 로 공유)"""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("⚠️ gunicorn이 설치되지 않았습니다. pip install gunicorn으로 설치하세요.")
+        print("단일 프로세스(스레드) 모드로 실행합니다.")
+        start_udp_listener(receive_distance_datagram)
+        app.run(host=host, port=port, debug=False, threaded=True)
+        return
+
+    class StandaloneApplication(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    StandaloneApplication(app, {
+        'bind': f'{host}:{port}',
+        'workers': workers,
+        'threads': int(os.getenv('WEB_THREADS', 4)),
+        'worker_class': 'gthread',
+        # UDP 수신 스레드는 fork 이후 워커 안에서 시작
+        'post_worker_init': lambda worker: start_udp_listener(receive_distance_datagram),
+    }).run()
+
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=3000, debug=True)
+    host = os.getenv('WEB_SERVER_HOST', '0.0.0.0')
+    port = int(os.getenv('WEB_SERVER_PORT', 3000))
+
+    if os.getenv('WEB_SERVER_MODE', 'dev') == 'production':
+        workers = int(os.getenv('WEB_WORKERS', os.cpu_count() or 1))
+        # 저장소는 워커 안에서 처음 쓸 때 생성 (마스터에서 만들면 fork 로 상속되어 종료 처리가 꼬임)
+        backend = backend_class()
+        if workers > 1 and not backend.shared:
+            print(f"⚠️ '{backend.name}' 저장소는 워커 간 공유되지 않습니다. 워커 1개로 실행합니다.")
+            print("여러 워커를 쓰려면 STATE_BACKEND=sqlite 또는 redis로 설정하세요.")
+            workers = 1
+        print(f"🚀 프로덕션 모드: 워커 {workers}개, 저장소 {backend.name}")
+        # /metrics, /debug/profile 은 프로세스별 상태 -> 워커가 여럿이면 거절하도록 알림
+        os.environ['INSTRUMENT_WORKERS'] = str(workers)
+        if workers > 1:
+            print("ℹ️ 워커가 여럿이면 /metrics, /debug/profile 은 비활성화됩니다 (측정 시 WEB_WORKERS=1).")
+        run_production(host, port, workers)
+    else:
+        # 디버그 리로더는 자식 프로세스가 실제 서버이므로 그쪽에서만 UDP 수신
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            start_udp_listener(receive_distance_datagram)
+        app.run(host=host, port=port, debug=True)